@@ -1,3 +1,4 @@
+import click
 from flask import Flask
 # ORM library – allows you to communicate with the database
 # via Python objects
@@ -8,12 +9,46 @@ from flask_jwt_extended import JWTManager
 # Library – allows the front end (e.g. React)
 # to connect to the backend on a different port.
 from flask_cors import CORS
-from flask_migrate import Migrate
+from sqlalchemy import event
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 
 db = SQLAlchemy()  # create SQLAlchemy
 jwt = JWTManager()
-migrate = Migrate()
+
+
+def init_migrate(app):
+    """Set up Flask-Migrate, needed by `flask db` and flask_migrate.upgrade() & co."""
+    if "migrate" not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+
+class LazyMigrateGroup(click.Group):
+    # Flask-Migrate imports alembic (~0.2 s), which only `flask db ...` needs.
+    # This stands in for its command group and loads it on first use.
+    def __init__(self, app):
+        super().__init__("db", help="Perform database migrations.")
+        self.app = app
+
+    def migrate_group(self):
+        init_migrate(self.app)
+        from flask_migrate.cli import db as migrate_group
+        return migrate_group
+
+    def list_commands(self, ctx):
+        return self.migrate_group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self.migrate_group().get_command(ctx, name)
+
+
+def set_sqlite_pragmas(dbapi_connection, pragmas):
+    # PRAGMAs are per connection, so this runs for each one the pool opens
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
 
 
 def create_app():
@@ -24,18 +59,48 @@ def create_app():
     app.config.from_object(Config)
 
     db.init_app(app)  # Initialization SQLAlchemy
-    migrate.init_app(app, db)
+    app.cli.add_command(LazyMigrateGroup(app))
+
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            pragmas = app.config.get("SQLITE_PRAGMAS", {})
+            event.listen(db.engine, "connect", lambda dbapi_connection, _: set_sqlite_pragmas(dbapi_connection, pragmas))
+
+    if app.config.get("PROXY_FIX_X_FOR"):
+        # request.remote_addr becomes the client's address from X-Forwarded-For
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
     jwt.init_app(app)
     # We are limiting CORS to API only
-    CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
+    CORS(app, resources={r"/api/*": {"origins": "*"}, r"/healthz": {"origins": "*"}}, supports_credentials=True)
 
     from app.auth import auth_bp
     from app.courses import courses_bp, classes_bp
+    from app.dashboard import dashboard_bp
+    from app.health import health_bp
+    from app.search import search_bp
+    from app.sync import sync_bp
     from app import models
+    from app.metrics import init_metrics
+    from app.limits import init_limiter
+    from app.jsonprovider import init_json
+    from app.compression import init_compression
+    from app.importer import import_data
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(courses_bp, url_prefix="/api/courses")
     app.register_blueprint(classes_bp, url_prefix="/api/classes")
+    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+    app.register_blueprint(search_bp, url_prefix="/api/search")
+    app.register_blueprint(sync_bp, url_prefix="/api/sync")
+    app.register_blueprint(health_bp)
+
+    init_metrics(app, db)
+    init_limiter(app)
+    init_json(app)
+    init_compression(app)
+    # flask import-data <kind> <file>
+    app.cli.add_command(import_data)
 
     @app.route("/")
     def index():
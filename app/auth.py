@@ -2,20 +2,41 @@ from datetime import datetime, timedelta
 # Blueprint - allows to split your Flask app into modules (here: auth)
 # request - to read data from a request (e.g. JSON from a login form)
 # jsonify - converts Python data to JSON for HTTP response
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, current_app, request, jsonify
 # get_jwt – gets the entire token payload (to check roles, for example)
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
+# current_user - the caller's Identity(id, role), from the identity cache (app/identity.py)
+from flask_jwt_extended import current_user
 # To create own decorators - here we use it in admin_required
 from functools import wraps
+from sqlalchemy import delete, select, update
 from app import db
-from app.models import User
+from app.models import CourseClass, User, user_classes, user_course
+from app.catalog import invalidate_catalog
+from app.events import seat_broker
+from app.identity import identity_cache
+from app.revocation import revocation_store
+from app.serializers import get_enrolled_classes, user_to_dict
+from app.limits import configured, email_key, limiter, user_key
+from app.passwords import HashingBusy, password_hasher
 
 # All paths will have prefix: /api/auth/
 auth_bp = Blueprint("auth", __name__)
 
+# Login, register and refresh share one per-IP budget - each of them is slow
+# (password hash) or hands out tokens
+auth_ip_limit = limiter.shared_limit(configured("AUTH_RATE_LIMIT_PER_IP"), scope="auth")
+
+
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    # every password hashing slot is taken, the client should retry shortly
+    return jsonify({"error": "Server is busy, please try again."}), 503, {"Retry-After": "1"}
+
 
 @auth_bp.route('/register', methods=['POST'])
+@auth_ip_limit
+@limiter.limit(configured("AUTH_RATE_LIMIT_PER_EMAIL"), key_func=email_key)
 def register():
     data = request.json
 
@@ -27,7 +48,7 @@ def register():
     if existing_user:
         return jsonify({"error": "Email already registered"}), 409
 
-    hashed_password = generate_password_hash(data["password"])
+    hashed_password = password_hasher.hash(data["password"])
     new_user = User(
         first_name=data["first_name"],
         last_name=data["last_name"],
@@ -58,6 +79,8 @@ def register():
 
 # user Login and Token Generation
 @auth_bp.route('/login', methods=['POST'])
+@auth_ip_limit
+@limiter.limit(configured("AUTH_RATE_LIMIT_PER_EMAIL"), key_func=email_key)
 def login():
     data = request.json
     email = data.get("email")
@@ -68,9 +91,18 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not check_password_hash(user.password, password):
+    if not user or not password_hasher.verify(user.password, password):
         return jsonify({"error": "Invalid credentials"}), 401
 
+    # The hash parameters changed since this password was stored. Upgrade it
+    # now that we know the password - a busy pool just leaves it for next time.
+    if password_hasher.needs_rehash(user.password):
+        try:
+            user.password = password_hasher.hash(password)
+            db.session.commit()
+        except HashingBusy:
+            db.session.rollback()
+
     # create a JWT token with user information
     access_token = (create_access_token(identity=str(user.id),
                                         additional_claims={"role": user.role},
@@ -81,13 +113,20 @@ def login():
 
 
 @auth_bp.route('/refresh', methods=['POST'])
+@auth_ip_limit
+@limiter.limit(configured("REFRESH_RATE_LIMIT_PER_USER"), key_func=user_key)
 @jwt_required(refresh=True)
 def refresh():
     user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
+    # a deleted user never gets here, the user lookup answers 404
+    user = current_user
 
-    if not user:
-        return jsonify({"error": "User not found"}), 404
+    # Rotation: every refresh token is good for one refresh, plus
+    # REFRESH_REUSE_GRACE seconds for requests racing with it (two tabs,
+    # StrictMode's double effect). A replay after that is refused.
+    token = get_jwt()
+    if not revocation_store.revoke(token["jti"], token["exp"], grace=current_app.config["REFRESH_REUSE_GRACE"]):
+        return jsonify({"error": "Token has been revoked"}), 401
 
     new_access_token = create_access_token(
         identity=user_id,
@@ -95,7 +134,7 @@ def refresh():
         expires_delta=timedelta(minutes=5)
     )
 
-    new_refresh_token = create_refresh_token(identity=user.id)
+    new_refresh_token = create_refresh_token(identity=user_id)
 
     return jsonify({
         "access_token": new_access_token,
@@ -115,57 +154,48 @@ def refresh():
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_user():
-    print("TOKEN IDENTITY:", get_jwt_identity())
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
+    user = User.query.get(current_user.id)
 
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    return jsonify({
-        "id": user.id,
-        "first_name": user.first_name,
-        "last_name": user.last_name,
-        "email": user.email,
-        "phone_number": user.phone_number,
-        "role": user.role
-    }), 200
+    return jsonify(user_to_dict(user)), 200
 
 
 @auth_bp.route('/my-classes', methods=["GET"])
 @jwt_required()
 def get_user_classes():
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    return jsonify([{
-        "id": course_class.id,
-        "course_name": course_class.course.name,
-        "trainer": course_class.trainer,
-        "day_of_week": course_class.day_of_week,
-        "time": course_class.time,
-        "location": course_class.location,
-        "available_spots": course_class.available_spots,
-        "total_max_spots": course_class.total_max_spots
-    } for course_class in user.classes]), 200
+    return jsonify(get_enrolled_classes(current_user.id)), 200
 
 
 @auth_bp.route("/delete-account", methods=["DELETE"])
 @jwt_required()
 def delete_account():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    user.classes.clear()
-
-    db.session.delete(user)
+    user = current_user
+
+    # Give the seats back and drop the enrollments in the same transaction,
+    # one statement each instead of loading user.classes
+    freed = db.session.execute(
+        update(CourseClass)
+        .where(CourseClass.id.in_(select(user_classes.c.class_id).where(user_classes.c.user_id == user.id)))
+        .values(available_spots=CourseClass.available_spots + 1)
+        .returning(CourseClass.id, CourseClass.available_spots)
+    ).all()
+    db.session.execute(delete(user_classes).where(user_classes.c.user_id == user.id))
+    db.session.execute(delete(user_course).where(user_course.c.user_id == user.id))
+    db.session.execute(delete(User).where(User.id == user.id))
     db.session.commit()
+    # a bulk DELETE skips the ORM events, drop the cached identity here
+    identity_cache.invalidate(user.id)
+    # Other tokens of the account fail the user lookup, user ids are
+    # AUTOINCREMENT and never handed to a new user. This one is revoked
+    # right away as well.
+    token = get_jwt()
+    revocation_store.revoke(token["jti"], token["exp"])
+
+    for class_id, available_spots in freed:
+        seat_broker.publish(class_id, available_spots)
+    invalidate_catalog()
 
     return jsonify({"message": "Account deleted successfully"}), 200
 
@@ -0,0 +1,76 @@
+import hashlib
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.compression import available_encodings, compress
+from app.models import Course, CourseClass
+
+# Process-level cache of the public course catalog.
+# Every open tab polls /api/courses/public, so we build the JSON body once
+# and serve it until something changes (or the TTL runs out - other gunicorn
+# workers cannot invalidate our copy, the TTL keeps them in sync).
+_lock = threading.Lock()
+_cache = {"items": None, "body": None, "etag": None, "encoded": {}, "built_at": 0.0}
+
+
+def build_public_catalog():
+    # One aggregated query instead of 1 + 2N lazy loads of course.classes
+    rows = (
+        db.session.query(
+            Course.id,
+            Course.name,
+            Course.description,
+            func.count(CourseClass.id),
+            func.coalesce(func.sum(CourseClass.available_spots), 0),
+        )
+        .outerjoin(CourseClass, CourseClass.course_id == Course.id)
+        .group_by(Course.id)
+        .order_by(Course.id)
+        .all()
+    )
+
+    return [
+        {
+            "id": course_id,
+            "name": name,
+            "description": description,
+            "class_count": class_count,
+            "total_available_spots": total_available_spots,
+        }
+        for course_id, name, description, class_count, total_available_spots in rows
+    ]
+
+
+def get_public_catalog():
+    """Return the cached catalog, rebuilding it when stale.
+
+    The result is a dict with the course list ("items", sorted by id), its
+    serialized JSON "body", the "etag" of that body and the body compressed
+    with each available encoding ("encoded", empty for small bodies).
+    """
+    ttl = current_app.config.get("CATALOG_CACHE_TTL", 0)
+
+    with _lock:
+        if _cache["body"] is not None and time.monotonic() - _cache["built_at"] < ttl:
+            return dict(_cache)
+
+        items = build_public_catalog()
+        body = current_app.json.dumps(items).encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()
+
+        # compressed once per change of the catalog, not once per request
+        encoded = _cache["encoded"]
+        if etag != _cache["etag"]:
+            encoded = {}
+            if current_app.config.get("COMPRESS_ENABLED") and len(body) >= current_app.config["COMPRESS_MIN_SIZE"]:
+                encoded = {encoding: compress(body, encoding) for encoding in available_encodings()}
+
+        _cache.update(items=items, body=body, etag=etag, encoded=encoded, built_at=time.monotonic())
+        return dict(_cache)
+
+
+def invalidate_catalog():
+    with _lock:
+        _cache.update(items=None, body=None, etag=None, encoded={}, built_at=0.0)
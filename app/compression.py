@@ -0,0 +1,71 @@
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content types worth compressing, everything else (images, CSV exports
+# that stream) is sent as is
+COMPRESSIBLE = {"application/json", "text/plain", "text/html", "text/csv"}
+
+
+def compress(body, encoding):
+    config = current_app.config
+    if encoding == "br":
+        return brotli.compress(body, quality=config["COMPRESS_BR_QUALITY"])
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=config["COMPRESS_GZIP_LEVEL"], mtime=0)
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(encodings=None):
+    """The Content-Encoding to answer this request with, br over gzip at equal quality, or None."""
+    if not current_app.config.get("COMPRESS_ENABLED"):
+        return None
+    if encodings is None:
+        encodings = available_encodings()
+    accepted = request.accept_encodings
+    best = max(encodings, key=lambda encoding: accepted[encoding], default=None)
+    return best if best and accepted[best] > 0 else None
+
+
+def set_encoded_body(response, body, encoding):
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    # A compressed body differs from the plain one byte for byte, so its
+    # ETag can only be weak. If-None-Match compares weakly, 304s still work.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def init_compression(app):
+    """Compress responses of COMPRESS_MIN_SIZE bytes or more with gzip, or br if Brotli is installed."""
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+            or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE
+        ):
+            return response
+
+        body = response.get_data()
+        if len(body) < current_app.config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        # negotiated even when the client accepts nothing, caches must
+        # still keep the variants apart
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding()
+        if encoding:
+            set_encoded_body(response, compress(body, encoding), encoding)
+        return response
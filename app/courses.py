@@ -1,17 +1,123 @@
+import csv
+import hashlib
+import io
+import json
 from datetime import datetime
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import current_user, jwt_required
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
 from app import db
-from app.models import Course, CourseClass, User
+from app.models import (Course, CourseClass, User, WEEKDAYS, parse_duration, parse_time, parse_weekday,
+                        user_classes, user_course)
 from app.auth import admin_required
+from app.idempotency import idempotent
+from app.identity import identity_cache
+from app.catalog import get_public_catalog, invalidate_catalog
+from app.compression import choose_encoding, set_encoded_body
+from app.serializers import class_to_dict, course_class_to_dict, get_enrolled_classes
+from app.events import seat_broker, seat_stream
+from app.limits import configured, limiter, user_key
+from app.timetable import find_conflict
+from app.pagination import PaginationError, parse_list_args, paginate_query, paginate_list, shape_response
 
 courses_bp = Blueprint("courses", __name__, url_prefix="/api/courses")
 classes_bp = Blueprint("classes", __name__, url_prefix="/api/classes")
 
+# Columns clients may pick with ?fields= on the list endpoints
+CATALOG_FIELDS = ("id", "name", "description", "class_count", "total_available_spots")
+CLASS_FIELDS = ("id", "day_of_week", "time", "duration_minutes", "location", "trainer", "available_spots",
+                "total_max_spots")
+MEMBER_FIELDS = ("id", "first_name", "last_name")
+SCHEDULE_FIELDS = CLASS_FIELDS + ("course_id", "course_name")
+
+# Columns of the roster export, in output order
+ROSTER_COLUMNS = (
+    ("class_id", CourseClass.id),
+    ("course_name", Course.name),
+    ("day_of_week", CourseClass.day_of_week),
+    ("time", CourseClass.time),
+    ("location", CourseClass.location),
+    ("trainer", CourseClass.trainer),
+    ("user_id", User.id),
+    ("first_name", User.first_name),
+    ("last_name", User.last_name),
+    ("email", User.email),
+    ("phone_number", User.phone_number),
+)
+
+
+MAX_BATCH_CLASSES = 500
+
+# join and leave draw from one per-user budget
+join_leave_limit = limiter.shared_limit(configured("JOIN_RATE_LIMIT_PER_USER"), scope="join-leave", key_func=user_key)
+
+
+def build_course_class(course_id, data):
+    """A new CourseClass from request data, ValueError if the data is invalid."""
+    if not isinstance(data, dict):
+        raise ValueError("Each class must be an object")
+
+    if not all(k in data for k in ["day_of_week", "time", "location", "trainer", "available_spots"]):
+        raise ValueError("Missing required fields")
+
+    try:
+        available_spots = int(data["available_spots"])
+    except (TypeError, ValueError):
+        raise ValueError("available_spots must be an integer")
+
+    if available_spots <= 0:
+        raise ValueError("available_spots must be positive")
+
+    return CourseClass(
+        course_id=course_id,
+        day_of_week=data["day_of_week"],
+        time=data["time"],
+        duration_minutes=parse_duration(data.get("duration_minutes")),
+        location=data["location"],
+        trainer=data["trainer"],
+        available_spots=available_spots,
+        total_max_spots=available_spots
+    )
+
+
+def expand_recurrence(spec):
+    """days_of_week x times x locations -> list of class dicts."""
+    if not isinstance(spec, dict):
+        raise ValueError("recurrence must be an object")
+
+    lists = {}
+    for key in ("days_of_week", "times", "locations"):
+        value = spec.get(key)
+        if not isinstance(value, list) or not value:
+            raise ValueError(f"recurrence.{key} must be a non-empty list")
+        lists[key] = value
+
+    # trainer, available_spots and duration_minutes are shared by every generated class
+    shared = {k: spec[k] for k in ("trainer", "available_spots", "duration_minutes") if k in spec}
+    return [
+        {"day_of_week": day, "time": time, "location": location, **shared}
+        for day in lists["days_of_week"]
+        for time in lists["times"]
+        for location in lists["locations"]
+    ]
+
+
+# Every successful write (admin changes, join/leave) makes the cached
+# public catalog stale
+@courses_bp.after_request
+@classes_bp.after_request
+def invalidate_catalog_after_write(response):
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        invalidate_catalog()
+    return response
+
 
 @courses_bp.route('/', methods=['POST'])
 @jwt_required()
 @admin_required
+@idempotent
 def create_course():
     data = request.json
 
@@ -28,32 +134,46 @@ def create_course():
     )
 
     db.session.add(new_course)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent request created the same course in the meantime
+        db.session.rollback()
+        return jsonify({"error": "Course already exists"}), 409
 
     return jsonify({"message": "Course created successfully!", "course_id": new_course.id}), 201
 
 
 @courses_bp.route("/public", methods=["GET"])
 def get_public_courses():
-    courses = Course.query.all()
-
-    return jsonify([
-        {
-            "id": course.id,
-            "name": course.name,
-            "description": course.description,
-            "class_count": len(course.classes),
-            "total_available_spots": sum(c.available_spots for c in course.classes),
-        }
-        for course in courses
-    ]), 200
+    try:
+        limit, after_id, fields = parse_list_args(CATALOG_FIELDS)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    catalog = get_public_catalog()
+
+    if limit is None and fields is None:
+        response = Response(catalog["body"], status=200, mimetype="application/json")
+        response.set_etag(catalog["etag"])
+        # the cache holds the compressed bodies, the after_request hook leaves these alone
+        encoding = choose_encoding(tuple(catalog["encoded"]))
+        if encoding:
+            set_encoded_body(response, catalog["encoded"][encoding], encoding)
+    else:
+        items, next_cursor = paginate_list(catalog["items"], limit, after_id)
+        response = jsonify(shape_response(items, fields, limit, next_cursor))
+        # a page or projection changes exactly when the whole catalog does
+        response.set_etag(hashlib.sha1(f"{catalog['etag']}?{request.query_string.decode()}".encode()).hexdigest())
+
+    # answers If-None-Match with 304 Not Modified (empty body)
+    return response.make_conditional(request)
 
 
 @courses_bp.route("/my-courses", methods=["GET"])
 @jwt_required()
 def get_user_courses():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = User.query.get(current_user.id)
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -66,25 +186,58 @@ def get_user_courses():
 
 
 @classes_bp.route("/<int:class_id>/join", methods=["POST"])
+@join_leave_limit
 @jwt_required()
+@idempotent
 def join_class(class_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
+    user = current_user
     course_class = CourseClass.query.get(class_id)
 
-    if not user or not course_class:
-        return jsonify({"error": "User or class not found"}), 404
+    if not course_class:
+        return jsonify({"error": "Class not found"}), 404
 
-    if course_class in user.classes:
+    # The enrollment row and the seat decrement go out in one transaction.
+    # The composite primary key of user_classes rejects a second sign-up and
+    # the conditional UPDATE only takes a seat while there is one left, so
+    # concurrent workers can neither oversell a class nor lose a decrement.
+    try:
+        db.session.execute(insert(user_classes).values(user_id=user.id, class_id=class_id))
+    except IntegrityError as e:
+        db.session.rollback()
+        if "FOREIGN KEY" in str(e.orig):
+            # The user or the class was deleted meanwhile - a deleted user's
+            # identity can still be cached in this worker
+            if User.query.get(user.id) is None:
+                identity_cache.invalidate(user.id)
+                return jsonify({"error": "User not found"}), 404
+            return jsonify({"error": "Class not found"}), 404
         return jsonify({"error": "You are already registered in this class."}), 409
 
-    if course_class.available_spots <= 0:
+    # Checked after the insert: the transaction holds SQLite's write lock by
+    # now, so two concurrent joins of the same user cannot both pass
+    conflict = find_conflict(user.id, course_class)
+    if conflict:
+        db.session.rollback()
+        conflicting_class, course_name = conflict
+        return jsonify({
+            "error": "This class overlaps with another class you are registered in.",
+            "conflicting_class": {**course_class_to_dict(conflicting_class, course_name),
+                                  "course_id": conflicting_class.course_id},
+        }), 409
+
+    available_spots = db.session.execute(
+        update(CourseClass)
+        .where(CourseClass.id == class_id, CourseClass.available_spots > 0)
+        .values(available_spots=CourseClass.available_spots - 1)
+        .returning(CourseClass.available_spots)
+    ).scalar_one_or_none()
+
+    if available_spots is None:
+        db.session.rollback()
         return jsonify({"error": "No available spots in this class"}), 400
 
-    user.classes.append(course_class)
-    course_class.available_spots -= 1
-
     db.session.commit()
+    seat_broker.publish(class_id, available_spots)
 
     return jsonify({"message": "Successfully joined the classes!"}), 200
 
@@ -92,6 +245,7 @@ def join_class(class_id):
 @courses_bp.route('/<int:course_id>/classes', methods=['POST'])
 @jwt_required()
 @admin_required
+@idempotent
 def add_course_class(course_id):
     data = request.json
     course = Course.query.get(course_id)
@@ -99,18 +253,10 @@ def add_course_class(course_id):
     if not course:
         return jsonify({"error": "Course not found"}), 404
 
-    if not all(k in data for k in ["day_of_week", "time", "location", "trainer", "available_spots"]):
-        return jsonify({"error": "Missing required fields"}), 400
-
-    new_class = CourseClass(
-        course_id=course.id,
-        day_of_week=data["day_of_week"],
-        time=data["time"],
-        location=data["location"],
-        trainer=data["trainer"],
-        available_spots=data["available_spots"],
-        total_max_spots=data["available_spots"]
-    )
+    try:
+        new_class = build_course_class(course.id, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     db.session.add(new_class)
     db.session.commit()
@@ -118,6 +264,64 @@ def add_course_class(course_id):
     return jsonify({"message": "Class added successfully!", "class_id": new_class.id}), 201
 
 
+@courses_bp.route('/<int:course_id>/classes/batch', methods=['POST'])
+@jwt_required()
+@admin_required
+@idempotent
+def add_course_classes_batch(course_id):
+    """Create many classes in one transaction.
+
+    Body is either {"classes": [{...}, ...]} with the same fields as a single
+    class, or {"recurrence": {"days_of_week": [...], "times": [...],
+    "locations": [...], "trainer": ..., "available_spots": ...,
+    "duration_minutes": ...}} which creates one class per day x time x location.
+    """
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body must be an object"}), 400
+
+    course = Course.query.get(course_id)
+
+    if not course:
+        return jsonify({"error": "Course not found"}), 404
+
+    if "recurrence" in data:
+        try:
+            rows = expand_recurrence(data["recurrence"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    elif isinstance(data.get("classes"), list):
+        rows = data["classes"]
+    else:
+        return jsonify({"error": "Provide a list of classes or a recurrence"}), 400
+
+    if not rows:
+        return jsonify({"error": "No classes to create"}), 400
+
+    if len(rows) > MAX_BATCH_CLASSES:
+        return jsonify({"error": f"At most {MAX_BATCH_CLASSES} classes per batch"}), 400
+
+    # validate everything before touching the database
+    new_classes, errors = [], []
+    for index, row in enumerate(rows):
+        try:
+            new_classes.append(build_course_class(course.id, row))
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+
+    if errors:
+        return jsonify({"error": "Invalid classes, nothing was created", "details": errors}), 400
+
+    # one transaction - either every class is created or none
+    db.session.add_all(new_classes)
+    db.session.commit()
+
+    return jsonify({
+        "message": f"{len(new_classes)} classes added successfully!",
+        "class_ids": [c.id for c in new_classes]
+    }), 201
+
+
 @courses_bp.route('/<int:course_id>/classes', methods=['GET'])
 @jwt_required()
 def get_course_classes(course_id):
@@ -125,60 +329,130 @@ def get_course_classes(course_id):
     if not course:
         return jsonify({"error": "Course not found"}), 404
 
-    classes = CourseClass.query.filter_by(course_id=course_id).all()
+    try:
+        limit, after_id, fields = parse_list_args(CLASS_FIELDS)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify([{
-        "id": c.id,
-        "day_of_week": c.day_of_week,
-        "time": c.time,
-        "location": c.location,
-        "trainer": c.trainer,
-        "available_spots": c.available_spots,
-        "total_max_spots": c.total_max_spots,
-    } for c in classes]), 200
+    classes, next_cursor = paginate_query(CourseClass.query.filter_by(course_id=course_id),
+                                          CourseClass.id, limit, after_id)
+
+    return jsonify(shape_response([class_to_dict(c) for c in classes], fields, limit, next_cursor)), 200
 
 
 @courses_bp.route('/my-classes', methods=["GET"])
 @jwt_required()
 def get_user_classes():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    classes = get_enrolled_classes(current_user.id)
 
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-
-    if not user.classes:
+    if not classes:
         return jsonify({"classes": [], "message": "No classes enrolled yet"}), 200
 
-    return jsonify([{
-        "id": course_class.id,
-        "course_name": course_class.course.name,
-        "trainer": course_class.trainer,
-        "day_of_week": course_class.day_of_week,
-        "time": course_class.time
-    } for course_class in user.classes]), 200
+    return jsonify(classes), 200
 
 
 @classes_bp.route("/<int:class_id>/leave", methods=["DELETE"])
+@join_leave_limit
 @jwt_required()
+@idempotent
 def leave_class(class_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_user
     course_class = CourseClass.query.get(class_id)
 
-    if not user or not course_class:
-        return jsonify({"error": "User or class not found"}), 404
+    if not course_class:
+        return jsonify({"error": "Class not found"}), 404
 
-    if course_class not in user.classes:
+    # Same as join_class: delete the enrollment and give the seat back
+    # in a single transaction
+    result = db.session.execute(
+        delete(user_classes).where(user_classes.c.user_id == user.id, user_classes.c.class_id == class_id)
+    )
+
+    if result.rowcount == 0:
+        db.session.rollback()
         return jsonify({"error": "You are not registered in this class"}), 400
 
-    user.classes.remove(course_class)
-    course_class.available_spots += 1
+    available_spots = db.session.execute(
+        update(CourseClass)
+        .where(CourseClass.id == class_id)
+        .values(available_spots=CourseClass.available_spots + 1)
+        .returning(CourseClass.available_spots)
+    ).scalar_one()
     db.session.commit()
+    seat_broker.publish(class_id, available_spots)
 
     return jsonify({"message": "Successfully left the class"}), 200
 
 
+@classes_bp.route("", methods=["GET"])
+@jwt_required()
+def find_classes():
+    """Classes across all courses filtered by schedule.
+
+    ?weekday=tue,thu  ?from=17:00  ?to=19:00 (start time, inclusive)
+    ?location=  ?trainer=  ?free=true (only classes with available spots)
+    plus the usual ?limit= / ?cursor= / ?fields=.
+    """
+    try:
+        limit, after_id, fields = parse_list_args(SCHEDULE_FIELDS)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        weekdays = [parse_weekday(day) for day in request.args.get("weekday", "").split(",") if day]
+        start_from = parse_time(request.args["from"]) if request.args.get("from") else None
+        start_to = parse_time(request.args["to"]) if request.args.get("to") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = (
+        CourseClass.query
+        .join(CourseClass.course)
+        .options(contains_eager(CourseClass.course))
+    )
+
+    # A time range without days still goes through ix_course_class_schedule,
+    # as one range per weekday
+    if weekdays or start_from is not None or start_to is not None:
+        query = query.filter(CourseClass.weekday.in_(sorted(set(weekdays)) or range(len(WEEKDAYS))))
+    if start_from is not None:
+        query = query.filter(CourseClass.start_minute >= start_from)
+    if start_to is not None:
+        query = query.filter(CourseClass.start_minute <= start_to)
+    if request.args.get("location"):
+        query = query.filter(CourseClass.location == request.args["location"])
+    if request.args.get("trainer"):
+        query = query.filter(CourseClass.trainer == request.args["trainer"])
+    if request.args.get("free") in ("1", "true"):
+        query = query.filter(CourseClass.available_spots > 0)
+
+    classes, next_cursor = paginate_query(query, CourseClass.id, limit, after_id)
+
+    items = [{**course_class_to_dict(c, c.course.name), "course_id": c.course_id} for c in classes]
+    return jsonify(shape_response(items, fields, limit, next_cursor)), 200
+
+
+@classes_bp.route("/stream", methods=["GET"])
+# EventSource cannot send headers, so the token may come as ?jwt=
+@jwt_required(locations=["headers", "query_string"])
+def stream_seats():
+    """Server-Sent Events: {"class_id": ..., "available_spots": ...} on every seat change.
+
+    A stream holds a worker thread for as long as it is open, so there are
+    at most SEAT_STREAM_MAX_SUBSCRIBERS per worker (see gunicorn.conf.py).
+    """
+    config = current_app.config
+    if seat_broker.subscriber_count >= config["SEAT_STREAM_MAX_SUBSCRIBERS"]:
+        return jsonify({"error": "Too many open streams, try again later"}), 503, {"Retry-After": "30"}
+
+    return Response(
+        seat_stream(config.get("SEAT_STREAM_BUFFER", 256), config.get("SEAT_STREAM_HEARTBEAT", 15),
+                    config["SEAT_STREAM_MAX_SUBSCRIBERS"]),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @classes_bp.route("/<int:class_id>/members", methods=["GET"])
 @jwt_required()
 @admin_required
@@ -187,12 +461,89 @@ def get_class_members(class_id):
     if not course_class:
         return jsonify({"error": "Class not found"}), 404
 
-    members = course_class.users
-    return jsonify([{
+    try:
+        limit, after_id, fields = parse_list_args(MEMBER_FIELDS)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    members, next_cursor = paginate_query(
+        User.query.join(user_classes, user_classes.c.user_id == User.id).filter(user_classes.c.class_id == class_id),
+        User.id, limit, after_id
+    )
+
+    return jsonify(shape_response([{
         "id": user.id,
         "first_name": user.first_name,
         "last_name": user.last_name
-    } for user in members]), 200
+    } for user in members], fields, limit, next_cursor)), 200
+
+
+@classes_bp.route("/members/export", methods=["GET"])
+@jwt_required()
+@admin_required
+def export_members():
+    """Stream a roster as CSV (default) or NDJSON.
+
+    Exactly one of ?class_id=, ?course_id= or ?trainer= selects the classes.
+    Rows are read with a server-side cursor and written as they arrive, so
+    memory stays flat and the first bytes go out immediately.
+    """
+    export_format = request.args.get("format", "csv")
+    filters = {k: request.args.get(k) for k in ("class_id", "course_id", "trainer") if request.args.get(k)}
+
+    if export_format not in ("csv", "ndjson"):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    if len(filters) != 1:
+        return jsonify({"error": "Provide exactly one of class_id, course_id or trainer"}), 400
+
+    query = (
+        select(*[column.label(name) for name, column in ROSTER_COLUMNS])
+        .select_from(user_classes)
+        .join(CourseClass, CourseClass.id == user_classes.c.class_id)
+        .join(Course, Course.id == CourseClass.course_id)
+        .join(User, User.id == user_classes.c.user_id)
+        .order_by(CourseClass.id, User.id)
+        .execution_options(yield_per=1000)
+    )
+    try:
+        if "class_id" in filters:
+            query = query.where(CourseClass.id == int(filters["class_id"]))
+        elif "course_id" in filters:
+            query = query.where(CourseClass.course_id == int(filters["course_id"]))
+        else:
+            query = query.where(CourseClass.trainer == filters["trainer"])
+    except ValueError:
+        return jsonify({"error": "class_id and course_id must be integers"}), 400
+
+    def generate():
+        names = [name for name, _ in ROSTER_COLUMNS]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(names)
+
+        for rows in db.session.execute(query).partitions():
+            for row in rows:
+                if export_format == "csv":
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(dict(zip(names, row))) + "\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        # header of an empty roster
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    filename = "roster-" + "-".join(f"{k}-{v}" for k, v in filters.items())
+    filename = "".join(c if c.isalnum() or c in "-_" else "_" for c in filename)
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv" if export_format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
 
 
 @courses_bp.route('/<int:course_id>', methods=['PUT'])
@@ -211,7 +562,11 @@ def update_course(course_id):
     if "description" in data:
         course.description = data["description"]
 
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Course already exists"}), 409
 
     return jsonify({"message": "Course updated successfully!"}), 200
 
@@ -226,11 +581,17 @@ def update_course_class(course_id, class_id):
     if not course_class:
         return jsonify({"error": "Class not found"}), 404
 
-    if "day_of_week" in data:
-        course_class.day_of_week = data["day_of_week"]
+    try:
+        if "day_of_week" in data:
+            course_class.day_of_week = data["day_of_week"]
+
+        if "time" in data:
+            course_class.time = data["time"]
 
-    if "time" in data:
-        course_class.time = data["time"]
+        if "duration_minutes" in data:
+            course_class.duration_minutes = parse_duration(data["duration_minutes"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     if "location" in data:
         course_class.location = data["location"]
@@ -246,40 +607,55 @@ def update_course_class(course_id, class_id):
 
     db.session.commit()
 
+    if "available_spots" in data:
+        seat_broker.publish(course_class.id, course_class.available_spots)
+
     return jsonify({"message": "Class updated successfully!"}), 200
 
 
 @courses_bp.route('/<int:course_id>', methods=['DELETE'])
 @jwt_required()
 @admin_required
+@idempotent
 def delete_course(course_id):
     course = Course.query.get(course_id)
 
     if not course:
         return jsonify({"error": "Course not found"}), 404
 
-    for class_instance in course.classes:
-        db.session.delete(class_instance)
-
-    db.session.delete(course)
+    # Set-based deletes instead of loading every class and enrollment into
+    # the session. The foreign keys cascade too, these statements just
+    # don't rely on SQLite having foreign_keys switched on.
+    class_ids = select(CourseClass.id).where(CourseClass.course_id == course_id).scalar_subquery()
+    db.session.execute(delete(user_classes).where(user_classes.c.class_id.in_(class_ids)))
+    deleted_class_ids = db.session.execute(
+        delete(CourseClass).where(CourseClass.course_id == course_id).returning(CourseClass.id)
+    ).scalars().all()
+    db.session.execute(delete(user_course).where(user_course.c.course_id == course_id))
+    db.session.execute(delete(Course).where(Course.id == course_id))
     db.session.commit()
 
+    for class_id in deleted_class_ids:
+        seat_broker.publish(class_id, None)
+
     return jsonify({"message": "Course and all classes deleted successfully!"}), 200
 
 
 @courses_bp.route('/<int:course_id>/classes/<int:class_id>', methods=['DELETE'])
 @jwt_required()
 @admin_required
+@idempotent
 def delete_class(course_id, class_id):
     course_class = CourseClass.query.filter_by(id=class_id, course_id=course_id).first()
 
     if not course_class:
         return jsonify({"error": "Class not found"}), 404
 
-    course_class.users.clear()
-
-    db.session.delete(course_class)
+    db.session.execute(delete(user_classes).where(user_classes.c.class_id == class_id))
+    db.session.execute(delete(CourseClass).where(CourseClass.id == class_id))
     db.session.commit()
+    # available_spots None = the class is gone
+    seat_broker.publish(class_id, None)
 
     return jsonify({"message": "Class deleted successfully!"}), 200
 
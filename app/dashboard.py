@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
+from app.models import CourseClass, User
+from app.catalog import get_public_catalog
+from app.serializers import class_to_dict, get_enrolled_classes, user_to_dict
+
+# All paths will have prefix: /api/dashboard
+dashboard_bp = Blueprint("dashboard", __name__)
+
+
+@dashboard_bp.route("", methods=["GET"])
+@jwt_required()
+def get_dashboard():
+    """Everything the dashboard needs for its first render in one round trip.
+
+    Optional ?course_id= also returns the classes of the expanded course.
+    Costs at most four queries: the user, their classes, the course's
+    classes and the catalog (usually served from the cache).
+    """
+    user = User.query.get(current_user.id)
+
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    course_id = request.args.get("course_id", type=int)
+    my_classes = get_enrolled_classes(user.id)
+
+    response = {
+        "user": user_to_dict(user),
+        "courses": get_public_catalog()["items"],
+        "my_classes": my_classes,
+        "enrolled_class_ids": [c["id"] for c in my_classes],
+    }
+
+    if course_id is not None:
+        classes = CourseClass.query.filter_by(course_id=course_id).order_by(CourseClass.id).all()
+        response["course_classes"] = [class_to_dict(c) for c in classes]
+
+    return jsonify(response), 200
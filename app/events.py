@@ -0,0 +1,138 @@
+import json
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+
+class Subscriber:
+    """Pending seat updates of one stream, bounded and coalesced per class.
+
+    Only the latest available_spots of a class matters, so a new update
+    replaces an unsent one for the same class. If a slow consumer falls
+    more than `max_pending` classes behind, the oldest updates are dropped
+    and the stream tells the client to resync.
+    """
+
+    def __init__(self, max_pending):
+        self.max_pending = max_pending
+        self.pending = OrderedDict()
+        self.overflowed = False
+        self.condition = threading.Condition()
+
+    def push(self, updates):
+        with self.condition:
+            was_empty = not self.pending
+            for class_id, available_spots in updates:
+                self.pending.pop(class_id, None)
+                self.pending[class_id] = available_spots
+                if len(self.pending) > self.max_pending:
+                    self.pending.popitem(last=False)
+                    self.overflowed = True
+            # the stream only waits while nothing is pending, so only the
+            # first update of a batch has to wake it up
+            if was_empty:
+                self.condition.notify()
+
+    def pop_all(self, timeout):
+        """Wait up to `timeout` seconds, return (updates, overflowed)."""
+        with self.condition:
+            if not self.pending and not self.overflowed:
+                self.condition.wait(timeout)
+            updates = list(self.pending.items())
+            overflowed = self.overflowed
+            self.pending.clear()
+            self.overflowed = False
+            return updates, overflowed
+
+
+class SeatBroker:
+    """In-process pub/sub of seat availability.
+
+    publish() only queues the update, a background thread fans it out in
+    batches, so a request never waits for the subscribers. Subscribers
+    only see updates made by the worker process they are connected to.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._queue = queue.SimpleQueue()
+        self._dispatcher_pid = None
+
+    def subscribe(self, max_pending=256, max_subscribers=None):
+        """A new Subscriber, None if max_subscribers are subscribed already."""
+        subscriber = Subscriber(max_pending)
+        with self._lock:
+            if max_subscribers is not None and len(self._subscribers) >= max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, class_id, available_spots):
+        self._queue.put((class_id, available_spots))
+        # started lazily (and again after a fork) in the process that publishes
+        if self._dispatcher_pid != os.getpid():
+            with self._lock:
+                if self._dispatcher_pid != os.getpid():
+                    self._dispatcher_pid = os.getpid()
+                    threading.Thread(target=self._dispatch, name="seat-broker", daemon=True).start()
+
+    def _dispatch(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                subscriber.push(batch)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+seat_broker = SeatBroker()
+
+
+def sse_stream(subscriber, heartbeat=15.0):
+    """Generator of Server-Sent Events for one subscriber."""
+    try:
+        # makes the browser open the stream immediately
+        yield "retry: 3000\n\n"
+        while True:
+            updates, overflowed = subscriber.pop_all(heartbeat)
+            if overflowed:
+                yield "event: resync\ndata: {}\n\n"
+            for class_id, available_spots in updates:
+                data = json.dumps({"class_id": class_id, "available_spots": available_spots})
+                yield f"data: {data}\n\n"
+            if not updates and not overflowed:
+                # comment line, keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+    finally:
+        seat_broker.unsubscribe(subscriber)
+
+
+def seat_stream(max_pending, heartbeat, max_subscribers=None):
+    """sse_stream of a subscriber that only subscribes once the response is iterated.
+
+    A response that is never sent (the client left, the server gave up on
+    it) never subscribes, so it cannot leak a subscriber.
+    """
+    subscriber = seat_broker.subscribe(max_pending, max_subscribers)
+    if subscriber is None:
+        # the last slot went to another stream since the view checked,
+        # the browser reconnects after the retry delay
+        yield "retry: 3000\n\n"
+        return
+    yield from sse_stream(subscriber, heartbeat)
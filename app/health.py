@@ -0,0 +1,51 @@
+import threading
+import time
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+from app import db
+
+# Health checks for the load balancer and the frontend's keep-alive ping.
+# /healthz touches no models and no tables, so it answers as soon as the
+# worker is up; /healthz?deep=1 also round-trips the database.
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    if request.args.get("deep") not in ("1", "true"):
+        return jsonify({"status": "ok"}), 200
+
+    started = time.perf_counter()
+    try:
+        db.session.execute(text("SELECT 1"))
+    except Exception as e:
+        current_app.logger.warning("Health check failed: %s", e)
+        return jsonify({"status": "error", "error": "Database unavailable"}), 503
+    database_ms = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify({"status": "ok", "database_ms": database_ms}), 200
+
+
+def warm_up(app):
+    """Open a pooled DB connection, build the catalog cache, load the revoked tokens and start the hash pool."""
+    from app.catalog import get_public_catalog
+    from app.passwords import password_hasher
+    from app.revocation import revocation_store
+
+    started = time.perf_counter()
+    with app.app_context():
+        try:
+            db.session.execute(text("SELECT 1"))
+            get_public_catalog()
+            revocation_store.sync()
+            password_hasher.start()
+        except Exception:
+            app.logger.exception("Warm-up failed")
+        finally:
+            db.session.remove()
+    app.logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000)
+
+
+def start_warm_up(app):
+    # in the background, so the worker accepts requests right away
+    if app.config.get("WARMUP_ON_START"):
+        threading.Thread(target=warm_up, args=(app,), name="warm-up", daemon=True).start()
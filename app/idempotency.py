@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+from flask import Response, current_app, jsonify, make_response, request
+from flask_jwt_extended import current_user
+from sqlalchemy import delete, insert, select, update
+from app import db
+from app.models import IdempotencyKey
+
+_prune_lock = threading.Lock()
+_pruned_at = float("-inf")
+
+
+def digest(*parts):
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).digest()[:16]
+
+
+def prune_idempotency_keys(now):
+    # at most once per IDEMPOTENCY_PRUNE_INTERVAL per worker, in the
+    # transaction of a write that happens anyway
+    global _pruned_at
+    with _prune_lock:
+        if time.monotonic() - _pruned_at < current_app.config["IDEMPOTENCY_PRUNE_INTERVAL"]:
+            return
+        _pruned_at = time.monotonic()
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+
+
+def forget(key):
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+    db.session.commit()
+
+
+def claim(key, request_hash):
+    """None if this request may run (key is now pending), otherwise the response to send instead.
+
+    A retry is a single primary key lookup, only a new key takes the write
+    lock to insert itself.
+    """
+    now = int(time.time())
+    stored = db.session.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.status, IdempotencyKey.body,
+               IdempotencyKey.mimetype, IdempotencyKey.expires_at)
+        .where(IdempotencyKey.key == key)
+    ).first()
+
+    if stored is None or stored.expires_at <= now:
+        if stored is not None:
+            # expired but not pruned yet
+            forget(key)
+        prune_idempotency_keys(now)
+        inserted = db.session.execute(
+            insert(IdempotencyKey).prefix_with("OR IGNORE").values(
+                key=key, request_hash=request_hash,
+                expires_at=now + current_app.config["IDEMPOTENCY_PENDING_TIMEOUT"],
+            )
+        ).rowcount
+        db.session.commit()
+        if inserted:
+            return None
+        # a concurrent request with the same key got there first
+        return claim(key, request_hash)
+
+    if stored.request_hash != request_hash:
+        return jsonify({"error": "This Idempotency-Key was used for a different request"}), 422
+    if stored.status is None:
+        return jsonify({"error": "A request with this Idempotency-Key is still being processed"}), 409
+
+    replay = Response(stored.body, status=stored.status, mimetype=stored.mimetype)
+    replay.headers["Idempotent-Replayed"] = "true"
+    return replay
+
+
+def idempotent(f):
+    """Run the view once per Idempotency-Key header, answer retries with the stored response.
+
+    Keys are per user, method and path; reusing one with another body is a
+    422. The response is kept for IDEMPOTENCY_TTL seconds and replayed as is,
+    without running the view again. Server errors are not kept, so their
+    retry runs again. Goes below jwt_required.
+
+    The views commit their own work, the response is stored right after in
+    a second transaction. A worker that dies between the two leaves the key
+    pending; once IDEMPOTENCY_PENDING_TIMEOUT has passed a retry runs the
+    view again. Joins, leaves, deletes and new courses then fail the view's
+    own checks (already registered, not found, name taken), added classes
+    would be added a second time.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        header = request.headers.get("Idempotency-Key")
+        if header is None:
+            return f(*args, **kwargs)
+        if not 0 < len(header) <= 255:
+            return jsonify({"error": "Idempotency-Key must be 1 to 255 characters"}), 400
+
+        key = digest(str(current_user.id), request.method, request.path, header)
+        request_hash = hashlib.sha256(request.get_data()).digest()[:16]
+        answer = claim(key, request_hash)
+        if answer is not None:
+            return answer
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            forget(key)
+            raise
+
+        # whatever the view left uncommitted is not part of its answer
+        db.session.rollback()
+        if response.status_code >= 500:
+            forget(key)
+            return response
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status=response.status_code, body=response.get_data(), mimetype=response.mimetype,
+                    expires_at=int(time.time()) + current_app.config["IDEMPOTENCY_TTL"])
+        )
+        db.session.commit()
+        return response
+
+    return decorated_function
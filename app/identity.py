@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import current_app, jsonify
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
+from app import db, jwt
+from app.models import User
+
+# What authenticated routes need to know about the caller. A plain tuple,
+# not a User instance, so it can outlive the session it was loaded in.
+Identity = namedtuple("Identity", ["id", "role"])
+
+
+class IdentityCache:
+    """LRU cache of Identity by user id, entries expire after IDENTITY_CACHE_TTL seconds.
+
+    Saves the SELECT of the user on every request with an access token.
+    Deleting a user or changing their role invalidates the entry in this
+    worker, other gunicorn workers see the change once the TTL runs out.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id, load):
+        config = current_app.config
+        ttl = config.get("IDENTITY_CACHE_TTL", 0)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        identity = load(user_id)
+        # unknown users are not cached, a user registered meanwhile is found at once
+        if identity is not None and ttl > 0:
+            with self._lock:
+                self._entries[user_id] = (identity, now)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > config["IDENTITY_CACHE_SIZE"]:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return identity
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._entries)}
+
+    def render(self):
+        """The counters in Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for name in ("hits", "misses", "evictions"):
+            lines += [
+                f"# HELP sportclub_identity_cache_{name}_total Identity cache {name}.",
+                f"# TYPE sportclub_identity_cache_{name}_total counter",
+                f"sportclub_identity_cache_{name}_total {stats[name]}",
+            ]
+        lines += [
+            "# HELP sportclub_identity_cache_size Identities currently cached.",
+            "# TYPE sportclub_identity_cache_size gauge",
+            f"sportclub_identity_cache_size {stats['size']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+identity_cache = IdentityCache()
+
+
+def load_identity(user_id):
+    row = db.session.query(User.id, User.role).filter(User.id == user_id).first()
+    return Identity(*row) if row else None
+
+
+@jwt.user_lookup_loader
+def lookup_user(jwt_header, jwt_data):
+    # current_user in the views; None makes jwt_required answer with user_not_found
+    return identity_cache.get(int(jwt_data["sub"]), load_identity)
+
+
+@jwt.user_lookup_error_loader
+def user_not_found(jwt_header, jwt_data):
+    return jsonify({"error": "User not found"}), 404
+
+
+# Role changes through the ORM are dropped from the cache once they are
+# committed - dropping them at flush would let another request cache the
+# old role again before the commit.
+@event.listens_for(User, "after_update")
+def user_updated(mapper, connection, user):
+    if inspect(user).attrs.role.history.has_changes():
+        object_session(user).info.setdefault("changed_identities", set()).add(user.id)
+
+
+@event.listens_for(User, "after_delete")
+def user_deleted(mapper, connection, user):
+    object_session(user).info.setdefault("changed_identities", set()).add(user.id)
+
+
+@event.listens_for(db.session, "after_commit")
+def drop_changed_identities(session):
+    for user_id in session.info.pop("changed_identities", ()):
+        identity_cache.invalidate(user_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def forget_changed_identities(session):
+    session.info.pop("changed_identities", None)
@@ -0,0 +1,219 @@
+import csv
+import itertools
+import json
+import time
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import Course, CourseClass, User, parse_duration, parse_time, parse_weekday, user_classes, utc_now
+
+
+class RowError(ValueError):
+    pass
+
+
+def required(row, name, max_length=None):
+    value = row.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ""):
+        raise RowError(f"missing {name}")
+    if max_length and len(str(value)) > max_length:
+        raise RowError(f"{name} longer than {max_length} characters")
+    return value
+
+
+def integer(row, name, default=None):
+    value = row.get(name)
+    if value in (None, ""):
+        if default is None:
+            raise RowError(f"missing {name}")
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{name} must be an integer")
+
+
+def optional_id(row):
+    # None lets SQLite assign the next id
+    return {"id": integer(row, "id") if row.get("id") not in (None, "") else None}
+
+
+def course_row(row, now):
+    return {**optional_id(row), "name": required(row, "name", 50), "description": required(row, "description"),
+            "created_at": now, "updated_at": now}
+
+
+def schedule(row):
+    try:
+        return {"weekday": parse_weekday(required(row, "day_of_week")),
+                "start_minute": parse_time(required(row, "time")),
+                "duration_minutes": parse_duration(row.get("duration_minutes"))}
+    except RowError:
+        raise
+    except ValueError as e:
+        raise RowError(str(e))
+
+
+def class_row(row, now):
+    total_max_spots = integer(row, "total_max_spots", default=integer(row, "available_spots", default=0))
+    if total_max_spots <= 0:
+        raise RowError("total_max_spots must be positive")
+    # the seats join_class could leave; enrollments imported later recount them
+    available_spots = integer(row, "available_spots", default=total_max_spots)
+    if not 0 <= available_spots <= total_max_spots:
+        raise RowError("available_spots must be between 0 and total_max_spots")
+    return {**optional_id(row), "course_id": integer(row, "course_id"),
+            **schedule(row),
+            "location": required(row, "location", 100), "trainer": required(row, "trainer", 50),
+            "available_spots": available_spots,
+            "total_max_spots": total_max_spots, "created_at": now, "updated_at": now}
+
+
+def date(row, name):
+    # same format as register; None when the column is empty
+    value = row.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        # as SQLAlchemy stores a Date in SQLite
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise RowError(f"{name} must be a YYYY-MM-DD date")
+
+
+def user_row(row, now):
+    if row.get("password_hash"):
+        password = row["password_hash"]
+    else:
+        # hashing is slow on purpose, prefer exporting password_hash
+        password = generate_password_hash(required(row, "password"), method=current_app.config["PASSWORD_HASH_METHOD"])
+    return {**optional_id(row), "first_name": required(row, "first_name", 20),
+            "last_name": row.get("last_name") or None, "email": required(row, "email", 30),
+            "password": password, "date_of_birth": date(row, "date_of_birth"),
+            "phone_number": row.get("phone_number") or None,
+            "role": row.get("role") or "user", "created_at": now, "updated_at": now}
+
+
+def enrollment_row(row, now):
+    return {"user_id": integer(row, "user_id"), "class_id": integer(row, "class_id"), "created_at": now}
+
+
+# kind -> (table, row builder)
+KINDS = {
+    "courses": (Course.__table__, course_row),
+    "classes": (CourseClass.__table__, class_row),
+    "users": (User.__table__, user_row),
+    "enrollments": (user_classes, enrollment_row),
+}
+
+
+def read_rows(path, file_format):
+    """Yield (line number, dict) from a CSV, JSON Lines or JSON array file.
+
+    CSV and JSON Lines are streamed; a JSON array has to be loaded whole.
+    """
+    if file_format == "auto":
+        file_format = "csv" if path.endswith(".csv") else "jsonl" if path.endswith((".jsonl", ".ndjson")) else "json"
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            # line 1 is the header
+            yield from enumerate(csv.DictReader(f), start=2)
+        elif file_format == "jsonl":
+            for number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield number, json.loads(line)
+        else:
+            yield from enumerate(json.load(f), start=1)
+
+
+def insert_chunk(table, chunk, skip_duplicates):
+    # Straight to the driver's executemany with plain tuples - building
+    # SQLAlchemy parameter dicts costs more than the insert itself
+    columns = list(chunk[0])
+    quote = db.engine.dialect.identifier_preparer.quote
+    statement = "INSERT {}INTO {} ({}) VALUES ({})".format(
+        "OR IGNORE " if skip_duplicates else "", quote(table.name),
+        ", ".join(quote(column) for column in columns), ", ".join("?" * len(columns))
+    )
+    # rows actually inserted: OR IGNORE skips duplicates silently. Not
+    # total_changes(), that also counts the rows the triggers write.
+    return db.session.connection().exec_driver_sql(
+        statement, [tuple(row[c] for c in columns) for row in chunk]
+    ).rowcount
+
+
+def recount_available_spots(now):
+    # enrollments bypass join_class, so the seat counters are derived again,
+    # classes whose count changed count as updated for /api/sync
+    spots = "total_max_spots - (SELECT COUNT(*) FROM user_classes WHERE user_classes.class_id = course_class.id)"
+    db.session.execute(text(
+        f"UPDATE course_class SET available_spots = {spots}, updated_at = :now WHERE available_spots != {spots}"
+    ), {"now": now})
+
+
+@click.command("import-data")
+@click.argument("kind", type=click.Choice(list(KINDS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(["auto", "csv", "jsonl", "json"]), default="auto",
+              help="Input format, guessed from the file extension by default.")
+@click.option("--chunk-size", default=10000, show_default=True, help="Rows per executemany transaction.")
+@click.option("--skip-duplicates", is_flag=True, help="Ignore rows that violate a unique key instead of aborting.")
+@click.option("--strict", is_flag=True, help="Abort on the first invalid row instead of skipping it.")
+@with_appcontext
+def import_data(kind, path, file_format, chunk_size, skip_duplicates, strict):
+    """Bulk import courses, classes, users or enrollments from PATH.
+
+    Rows are validated, then inserted chunk by chunk, each chunk in its own
+    transaction. Memory use does not grow with the file size (except for a
+    JSON array, which is read whole).
+    """
+    table, build = KINDS[kind]
+
+    # the rows go straight to the driver, so the timestamp is formatted the
+    # way SQLAlchemy stores a DateTime in SQLite, or comparisons would be off
+    now = utc_now().strftime("%Y-%m-%d %H:%M:%S.%f")
+    started = time.perf_counter()
+    imported = invalid = ignored = 0
+
+    def valid_rows():
+        nonlocal invalid
+        for number, row in read_rows(path, file_format):
+            try:
+                yield build(row, now)
+            except RowError as e:
+                if strict:
+                    raise click.ClickException(f"line {number}: {e}")
+                invalid += 1
+                click.echo(f"line {number}: skipped, {e}", err=True)
+
+    rows = valid_rows()
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        try:
+            inserted = insert_chunk(table, chunk, skip_duplicates)
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            raise click.ClickException(f"chunk after {imported} rows rejected, nothing of it imported: {e.orig}")
+
+        imported += inserted
+        ignored += len(chunk) - inserted
+        elapsed = time.perf_counter() - started
+        click.echo(f"{kind}: {imported} rows ({imported / elapsed:.0f} rows/s)")
+
+    if kind == "enrollments":
+        recount_available_spots(now)
+        db.session.commit()
+        overbooked = db.session.execute(text("SELECT COUNT(*) FROM course_class WHERE available_spots < 0")).scalar()
+        if overbooked:
+            click.echo(f"warning: {overbooked} classes have more enrollments than total_max_spots", err=True)
+
+    click.echo(f"Imported {imported} {kind} in {time.perf_counter() - started:.1f}s, {invalid} invalid rows skipped"
+               + (f", {ignored} duplicates ignored" if skip_duplicates else ""))
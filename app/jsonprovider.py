@@ -0,0 +1,43 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # the stdlib json of DefaultJSONProvider is used instead
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask's JSON provider (jsonify, request.json) with orjson doing the work.
+
+    Output matches DefaultJSONProvider apart from whitespace and non-ASCII
+    characters, which are sent as UTF-8 instead of \\u escapes. Dates still
+    go through Flask's default() and become HTTP dates.
+    """
+
+    # sort_keys is on in Flask's provider as well
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def dumps_bytes(self, obj, indent=False):
+        options = self.options | orjson.OPT_INDENT_2 if indent else self.options
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # json.dumps arguments orjson has no equivalent for
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_json(app):
+    if orjson is not None and app.config.get("JSON_ORJSON", True):
+        app.json = OrjsonProvider(app)
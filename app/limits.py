@@ -0,0 +1,50 @@
+from flask import current_app, jsonify, request
+from flask_jwt_extended import decode_token
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+# Storage, strategy and on/off come from the RATELIMIT_* settings in Config.
+# The limits are checked before the view runs, so a rejected request never
+# reaches the database or the password hash.
+limiter = Limiter(key_func=get_remote_address)
+
+
+def configured(name):
+    # limits are read per request, so tests and deployments can change them in config
+    return lambda: current_app.config[name]
+
+
+def email_key():
+    """Rate limit key for login/register: the email in the JSON body (IP if there is none)."""
+    data = request.get_json(silent=True)
+    email = data.get("email") if isinstance(data, dict) else None
+    if isinstance(email, str) and email.strip():
+        return "email:" + email.strip().lower()
+    return get_remote_address()
+
+
+def user_key():
+    """Rate limit key for authenticated routes: the token's user id (IP if the token is missing or bad).
+
+    Only decodes the token - no user lookup, no revocation check - so the
+    limit is checked before any database work. The view's own jwt_required
+    still rejects a bad or revoked token afterwards.
+    """
+    config = current_app.config
+    header_type, _, token = request.headers.get(config["JWT_HEADER_NAME"], "").partition(" ")
+    identity = None
+    if header_type == config["JWT_HEADER_TYPE"] and token:
+        try:
+            identity = decode_token(token)["sub"]
+        except Exception:
+            pass
+    return f"user:{identity}" if identity else get_remote_address()
+
+
+def init_limiter(app):
+    limiter.init_app(app)
+
+    @app.errorhandler(429)
+    def too_many_requests(e):
+        # Flask-Limiter adds Retry-After and the X-RateLimit headers
+        return jsonify({"error": "Too many requests, please try again later."}), 429
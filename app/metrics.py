@@ -0,0 +1,148 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """Per-endpoint latency histograms and SQL totals, kept in process memory."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, endpoint, method, status, duration, sql_count, sql_time):
+        key = (endpoint, method, status)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0,
+                    "sql_count": 0, "sql_time": 0.0,
+                }
+            index = bisect_left(self.buckets, duration)
+            if index < len(self.buckets):
+                series["buckets"][index] += 1
+            series["count"] += 1
+            series["sum"] += duration
+            series["sql_count"] += sql_count
+            series["sql_time"] += sql_time
+
+    def snapshot(self):
+        """{(endpoint, method, status): {"count", "sum", "sql_count", "sql_time"}}"""
+        with self._lock:
+            return {key: {name: value[name] for name in ("count", "sum", "sql_count", "sql_time")}
+                    for key, value in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """The collected series in Prometheus text exposition format."""
+        with self._lock:
+            series = {key: {**value, "buckets": list(value["buckets"])} for key, value in self._series.items()}
+
+        lines = [
+            "# HELP sportclub_request_duration_seconds Request latency per endpoint.",
+            "# TYPE sportclub_request_duration_seconds histogram",
+        ]
+        for (endpoint, method, status), value in sorted(series.items()):
+            labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, value["buckets"]):
+                cumulative += count
+                lines.append(f'sportclub_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'sportclub_request_duration_seconds_bucket{{{labels},le="+Inf"}} {value["count"]}')
+            lines.append(f"sportclub_request_duration_seconds_sum{{{labels}}} {value['sum']:.6f}")
+            lines.append(f"sportclub_request_duration_seconds_count{{{labels}}} {value['count']}")
+
+        lines += [
+            "# HELP sportclub_request_sql_statements_total SQL statements issued by requests.",
+            "# TYPE sportclub_request_sql_statements_total counter",
+        ]
+        for (endpoint, method, status), value in sorted(series.items()):
+            labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+            lines.append(f"sportclub_request_sql_statements_total{{{labels}}} {value['sql_count']}")
+
+        lines += [
+            "# HELP sportclub_request_db_seconds_total Time requests spent executing SQL.",
+            "# TYPE sportclub_request_db_seconds_total counter",
+        ]
+        for (endpoint, method, status), value in sorted(series.items()):
+            labels = f'endpoint="{endpoint}",method="{method}",status="{status}"'
+            lines.append(f"sportclub_request_db_seconds_total{{{labels}}} {value['sql_time']:.6f}")
+
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def init_metrics(app, db):
+    """Hook request timing and SQL counting into the app.
+
+    Enabled by METRICS_ENABLED (adds /api/metrics) or SLOW_REQUEST_MS
+    (logs requests slower than that, with their SQL).
+    """
+    slow_ms = app.config.get("SLOW_REQUEST_MS", 0)
+    if not app.config.get("METRICS_ENABLED") and not slow_ms:
+        return
+
+    # The start time lives on the statement's execution context, not the
+    # connection: a statement that fails never reaches after_cursor_execute
+    # and its context is simply dropped.
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.metrics_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if has_request_context() and "sql_count" in g:
+            g.sql_count += 1
+            g.sql_time += elapsed
+            if slow_ms:
+                g.sql_statements.append((elapsed, statement))
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.sql_statements = []
+
+    @app.after_request
+    def record_request(response):
+        if "request_start" not in g:
+            return response
+
+        duration = time.perf_counter() - g.request_start
+        endpoint = request.endpoint or "unmatched"
+        request_metrics.observe(endpoint, request.method, response.status_code,
+                                duration, g.sql_count, g.sql_time)
+
+        if slow_ms and duration * 1000 >= slow_ms:
+            statements = "\n".join(f"  {elapsed * 1000:.1f} ms  {statement}"
+                                   for elapsed, statement in g.sql_statements)
+            current_app.logger.warning("Slow request %s %s: %.1f ms, %d SQL statements (%.1f ms)\n%s",
+                                       request.method, request.path, duration * 1000,
+                                       g.sql_count, g.sql_time * 1000, statements)
+        return response
+
+    if app.config.get("METRICS_ENABLED"):
+        @app.route("/api/metrics")
+        def metrics():
+            from app.identity import identity_cache
+            return Response(request_metrics.render() + identity_cache.render(), mimetype="text/plain; version=0.0.4")
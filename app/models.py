@@ -1,23 +1,92 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from sqlalchemy import case, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from app import db
 
+
+def utc_now():
+    # naive UTC, SQLite has no time zones - the API adds the "Z"
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # Intermediate table for many-to-many relationships
 user_course = db.Table(
     'user_course',
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('course_id', db.Integer, db.ForeignKey('course.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('course_id', db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_user_course_course_id', 'course_id')
 )
 
 
 user_classes = db.Table(
         "user_classes",
-        db.Column("user_id", db.Integer, db.ForeignKey("user.id"), primary_key=True),
-        db.Column("class_id", db.Integer, db.ForeignKey("course_class.id"), primary_key=True)
+        db.Column("user_id", db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True),
+        db.Column("class_id", db.Integer, db.ForeignKey("course_class.id", ondelete="CASCADE"), primary_key=True),
+        # Copy of the class schedule (weekday, start and end minute), filled
+        # and kept current by the triggers in app/timetable.py. It lets the
+        # overlap check on join be one range scan of the user's own timetable.
+        db.Column("weekday", db.SmallInteger, nullable=True),
+        db.Column("start_minute", db.SmallInteger, nullable=True),
+        db.Column("end_minute", db.SmallInteger, nullable=True),
+        # when the user joined, for /api/sync
+        db.Column("created_at", db.DateTime, default=utc_now, nullable=False),
+        # The primary key leads with user_id - class rosters need their own index
+        db.Index("ix_user_classes_class_id", "class_id"),
+        db.Index("ix_user_classes_timetable", "user_id", "weekday", "start_minute"),
+        db.Index("ix_user_classes_created_at", "created_at")
     )
 
 
-def get_utc_now():
-    return (datetime.utcnow() + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+# Class length in minutes when CourseClass.duration_minutes is not set, and
+# the longest one allowed (the overlap check relies on that bound)
+DEFAULT_CLASS_DURATION = 60
+MAX_CLASS_DURATION = 240
+
+# CourseClass.weekday indexes into this, 0 = Monday like datetime.weekday()
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def parse_weekday(value):
+    """0-6 from a weekday number or a (case-insensitive, maybe abbreviated) name, ValueError otherwise."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        if 0 <= value <= 6:
+            return value
+    elif isinstance(value, str):
+        name = value.strip().lower()
+        if name.isdigit() and 0 <= int(name) <= 6:
+            return int(name)
+        for number, day in enumerate(WEEKDAYS):
+            if len(name) >= 2 and day.lower().startswith(name):
+                return number
+    raise ValueError(f"Unknown day of week: {value}")
+
+
+def parse_time(value):
+    """Minutes since midnight from "HH:MM" (seconds are ignored), ValueError otherwise."""
+    try:
+        hours, minutes = (int(part) for part in str(value).strip().split(":")[:2])
+    except ValueError:
+        raise ValueError(f"Invalid time: {value}, expected HH:MM")
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        raise ValueError(f"Invalid time: {value}, expected HH:MM")
+    return hours * 60 + minutes
+
+
+def parse_duration(value):
+    """Minutes between 1 and MAX_CLASS_DURATION, None for no value, ValueError otherwise."""
+    if value in (None, ""):
+        return None
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("duration_minutes must be an integer")
+    if not 1 <= minutes <= MAX_CLASS_DURATION:
+        raise ValueError(f"duration_minutes must be between 1 and {MAX_CLASS_DURATION}")
+    return minutes
+
+
+def format_time(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
 
 
 class User(db.Model):
@@ -29,44 +98,136 @@ class User(db.Model):
     date_of_birth = db.Column(db.Date, nullable=True)
     phone_number = db.Column(db.String(20), nullable=True)
     role = db.Column(db.String(10), default="user")
-    created_at = db.Column(db.String(19), default=get_utc_now, nullable=False)
-    updated_at = db.Column(db.String(19), default=get_utc_now, onupdate=get_utc_now, nullable=False)
+    created_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+    # indexed for /api/sync, which asks for the rows changed since a time
+    updated_at = db.Column(db.DateTime, default=utc_now, onupdate=utc_now, index=True, nullable=False)
 
     # Many-to-many relationship → a user can enroll in multiple courses
-    courses = db.relationship('Course', secondary=user_course, backref='students')
-    classes = db.relationship("CourseClass", secondary="user_classes", back_populates="users")
+    # passive_deletes - the database cascades deletes to the association rows
+    courses = db.relationship('Course', secondary=user_course, backref='students', passive_deletes=True)
+    classes = db.relationship("CourseClass", secondary="user_classes", back_populates="users", passive_deletes=True)
+
+    # ids are never handed out again - the tokens of a deleted account
+    # must not log in as whoever registers next
+    __table_args__ = {"sqlite_autoincrement": True}
 
 
 class Course(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(50), unique=True, index=True, nullable=False)
     description = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.String(19), default=get_utc_now, nullable=False)
-    updated_at = db.Column(db.String(19), default=get_utc_now, onupdate=get_utc_now, nullable=False)
+    created_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+    # indexed for /api/sync, which asks for the rows changed since a time
+    updated_at = db.Column(db.DateTime, default=utc_now, onupdate=utc_now, index=True, nullable=False)
 
     # One-to-many relationship → a course can have many classes (CourseClass)
-    classes = db.relationship("CourseClass", backref="course", lazy=True)
+    classes = db.relationship("CourseClass", backref="course", lazy=True, passive_deletes=True)
 
 
 class CourseClass(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
-    day_of_week = db.Column(db.String(10), nullable=False)
-    time = db.Column(db.String(8), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), index=True, nullable=False)
+    # 0 = Monday .. 6 = Sunday, see day_of_week for the name
+    weekday = db.Column(db.SmallInteger, nullable=False)
+    # minutes since midnight, see time for "HH:MM"
+    start_minute = db.Column(db.SmallInteger, nullable=False)
+    # None = DEFAULT_CLASS_DURATION
+    duration_minutes = db.Column(db.SmallInteger, nullable=True)
     location = db.Column(db.String(100), nullable=False)
     trainer = db.Column(db.String(50), nullable=False)
     available_spots = db.Column(db.Integer, nullable=False)
     total_max_spots = db.Column(db.Integer, nullable=False)
-    created_at = db.Column(db.String(19), default=get_utc_now, nullable=False)
-    updated_at = db.Column(db.String(19), default=get_utc_now, onupdate=get_utc_now, nullable=False)
+    created_at = db.Column(db.DateTime, default=utc_now, nullable=False)
+    # indexed for /api/sync, which asks for the rows changed since a time
+    updated_at = db.Column(db.DateTime, default=utc_now, onupdate=utc_now, index=True, nullable=False)
 
     # Many-to-many relationship → users signed up for specific classes
-    users = db.relationship("User", secondary="user_classes", back_populates="classes")
+    users = db.relationship("User", secondary="user_classes", back_populates="classes", passive_deletes=True)
+
+    # schedule filters are a range scan: weekday = ? AND start_minute BETWEEN ? AND ?
+    __table_args__ = (db.Index("ix_course_class_schedule", "weekday", "start_minute"),)
+
+    # The API keeps speaking "Tuesday" and "18:30", these translate to and
+    # from the integer columns (in Python and in SQL)
+    @hybrid_property
+    def day_of_week(self):
+        return WEEKDAYS[self.weekday]
+
+    @day_of_week.setter
+    def day_of_week(self, value):
+        self.weekday = parse_weekday(value)
+
+    @day_of_week.expression
+    def day_of_week(cls):
+        return case({number: day for number, day in enumerate(WEEKDAYS)}, value=cls.weekday)
+
+    @hybrid_property
+    def time(self):
+        return format_time(self.start_minute)
+
+    @time.setter
+    def time(self, value):
+        self.start_minute = parse_time(value)
+
+    @time.expression
+    def time(cls):
+        return func.printf("%02d:%02d", cls.start_minute // 60, cls.start_minute % 60)
+
+    @property
+    def end_minute(self):
+        return self.start_minute + (self.duration_minutes or DEFAULT_CLASS_DURATION)
 
     def formatted_time(self):
-        try:
-            dt = datetime.strptime(self.date, "%Y-%m-%d %H:%M")
-            return dt.strftime("%H:%M")
-        except ValueError:
-            return self.date
+        return self.time
+
+
 
+class RevokedToken(db.Model):
+    """A revoked JWT (spent refresh token, deleted account), kept until the token expires.
+
+    The ids only ever grow (AUTOINCREMENT), so each worker can pick up the
+    rows added by the others with an id range query (app/revocation.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    # unix time the token expires, the row can go after that
+    expires_at = db.Column(db.Integer, index=True, nullable=False)
+    # unix time the revocation takes effect, NULL = at once. A rotated
+    # refresh token stays good for REFRESH_REUSE_GRACE seconds.
+    effective_at = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+class Tombstone(db.Model):
+    """A deleted course, class or enrollment, so /api/sync can tell clients to drop it.
+
+    Written by the delete triggers in app/sync.py, which also see the rows
+    removed by ON DELETE CASCADE. Enrollments have the class in ref_id and
+    the user in user_id.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)
+    ref_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(db.DateTime, default=utc_now, index=True, nullable=False)
+
+
+class IdempotencyKey(db.Model):
+    """The response to a request with an Idempotency-Key, replayed to its retries (app/idempotency.py).
+
+    One row per key in a WITHOUT ROWID table, so a retry costs one primary
+    key lookup.
+    """
+    # sha256 of user, method, path and key, cut to 16 bytes
+    key = db.Column(db.LargeBinary(16), primary_key=True)
+    # sha256 of the request body, cut to 16 bytes - a reused key with another body is an error
+    request_hash = db.Column(db.LargeBinary(16), nullable=False)
+    # NULL while the first request is still running
+    status = db.Column(db.SmallInteger, nullable=True)
+    body = db.Column(db.LargeBinary, nullable=True)
+    mimetype = db.Column(db.String(50), nullable=True)
+    # unix time
+    expires_at = db.Column(db.Integer, index=True, nullable=False)
+
+    __table_args__ = {"sqlite_with_rowid": False}
@@ -0,0 +1,84 @@
+from bisect import bisect_right
+from flask import request
+
+MAX_PAGE_SIZE = 100
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def parse_list_args(allowed_fields):
+    """Read ?limit=, ?cursor= and ?fields= from the query string.
+
+    Returns (limit, cursor, fields). limit is None when the client did not
+    ask for a page - list endpoints then keep returning the plain array.
+    """
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    fields = request.args.get("fields")
+
+    if limit is None and cursor is None:
+        page_size = None
+    else:
+        try:
+            page_size = int(limit) if limit is not None else MAX_PAGE_SIZE
+        except ValueError:
+            raise PaginationError("limit must be an integer")
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise PaginationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    try:
+        after_id = int(cursor) if cursor else 0
+    except ValueError:
+        raise PaginationError("cursor must be an integer")
+
+    if fields:
+        fields = [f for f in fields.split(",") if f]
+        unknown = set(fields) - set(allowed_fields)
+        if unknown:
+            raise PaginationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # the cursor is the id, so it is always returned
+        if "id" not in fields:
+            fields.insert(0, "id")
+    else:
+        fields = None
+
+    return page_size, after_id, fields
+
+
+def paginate_query(query, id_column, limit, after_id):
+    """Keyset pagination on the id column: WHERE id > cursor ORDER BY id LIMIT n."""
+    query = query.order_by(id_column)
+    if limit is None:
+        return query.all(), None
+
+    rows = query.filter(id_column > after_id).limit(limit + 1).all()
+    return page(rows, limit)
+
+
+def paginate_list(items, limit, after_id):
+    """The same keyset semantics for an already loaded list sorted by id."""
+    if limit is None:
+        return items, None
+
+    start = bisect_right(items, after_id, key=lambda item: item["id"])
+    return page(items[start:start + limit + 1], limit)
+
+
+def page(rows, limit):
+    # one extra row was fetched to know whether another page exists
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, last["id"] if isinstance(last, dict) else last.id
+    return rows, None
+
+
+def shape_response(items, fields, limit, next_cursor):
+    if fields:
+        items = [{field: item[field] for field in fields} for item in items]
+
+    if limit is None:
+        return items
+    return {"items": items, "next_cursor": next_cursor}
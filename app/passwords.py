@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """More password hashes are waiting than PASSWORD_HASH_MAX_PENDING allows."""
+
+
+@lru_cache(maxsize=None)
+def normalized_method(method):
+    # werkzeug fills in defaults ("scrypt" -> "scrypt:32768:8:1"), the stored
+    # hash has the full form, so compare against that
+    return generate_password_hash("", method=method, salt_length=1).split("$", 1)[0]
+
+
+class PasswordHasher:
+    """Password hashing in a bounded process pool.
+
+    Hashing is slow on purpose. In a process pool it runs on other cores and
+    does not hold the request thread's GIL, so the worker keeps serving other
+    requests meanwhile. At most PASSWORD_HASH_MAX_PENDING hashes may be
+    queued, beyond that HashingBusy is raised instead of piling up requests.
+    PASSWORD_HASH_WORKERS = 0 hashes on the request thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    def _pool(self, config):
+        # one pool per process - a forked gunicorn worker cannot use its parent's
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # spawn, not fork: the app process is multi-threaded
+                    self._executor = ProcessPoolExecutor(max_workers=config["PASSWORD_HASH_WORKERS"],
+                                                         mp_context=multiprocessing.get_context("spawn"))
+                    self._slots = threading.BoundedSemaphore(config["PASSWORD_HASH_MAX_PENDING"])
+                    self._pid = os.getpid()
+        return self._executor, self._slots
+
+    def _run(self, function, *args):
+        config = current_app.config
+        if not config.get("PASSWORD_HASH_WORKERS"):
+            return function(*args)
+
+        executor, slots = self._pool(config)
+        if not slots.acquire(timeout=config["PASSWORD_HASH_QUEUE_TIMEOUT"]):
+            raise HashingBusy()
+        try:
+            return executor.submit(function, *args).result()
+        except BrokenProcessPool:
+            # a pool worker died (e.g. killed for memory), start a new pool next time
+            with self._lock:
+                self._pid = None
+            raise
+        finally:
+            slots.release()
+
+    def start(self):
+        """Start the pool processes now instead of on the first login."""
+        config = current_app.config
+        workers = config.get("PASSWORD_HASH_WORKERS")
+        if workers:
+            executor, _ = self._pool(config)
+            # each spawned worker imports werkzeug once, then answers at once
+            for future in [executor.submit(abs, 0) for _ in range(workers)]:
+                future.result()
+
+    def hash(self, password):
+        config = current_app.config
+        return self._run(generate_password_hash, password,
+                         config["PASSWORD_HASH_METHOD"], config["PASSWORD_HASH_SALT_LENGTH"])
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True when stored_hash was made with other parameters than the configured ones."""
+        return stored_hash.split("$", 1)[0] != normalized_method(current_app.config["PASSWORD_HASH_METHOD"])
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+            self._pid = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,143 @@
+import threading
+import time
+from flask import current_app, jsonify
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from app import db, jwt
+from app.models import RevokedToken
+
+
+def compact(jti):
+    # flask-jwt-extended jtis are UUIDs - 16 bytes instead of a 36 character string
+    if len(jti) == 36:
+        try:
+            return bytes.fromhex(jti.replace("-", ""))
+        except ValueError:
+            pass
+    return jti
+
+
+class RevocationStore:
+    """Revoked token ids (jti) in process memory, shared through the revoked_token table.
+
+    is_revoked() is a set lookup. At most every REVOCATION_SYNC_INTERVAL
+    seconds it first fetches the rows other workers added since the last
+    fetch - an id range of the primary key, not a full reload. Entries are
+    grouped by the hour they expire, so dropping expired ones only touches
+    those. Revocations that take effect later (a rotated refresh token's
+    reuse grace) wait in a small dict until then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = set()
+        self._by_hour = {}
+        # compact jti -> (effective_at, expires_at)
+        self._pending = {}
+        self._last_id = 0
+        self._synced_at = float("-inf")
+        self._pruned_at = 0.0
+
+    def _add(self, rows):
+        now = time.time()
+        for jti, expires_at, effective_at in rows:
+            key = compact(jti)
+            if effective_at is not None and effective_at > now:
+                self._pending[key] = (effective_at, expires_at)
+            else:
+                self._revoked.add(key)
+                self._by_hour.setdefault(expires_at // 3600, set()).add(key)
+
+    def _activate(self):
+        # pending revocations whose grace is over join the set
+        now = time.time()
+        for key, (effective_at, expires_at) in list(self._pending.items()):
+            if effective_at <= now:
+                del self._pending[key]
+                self._revoked.add(key)
+                self._by_hour.setdefault(expires_at // 3600, set()).add(key)
+
+    def sync(self):
+        """Fetch the tokens revoked since the last fetch, if that was REVOCATION_SYNC_INTERVAL ago."""
+        now = time.monotonic()
+        if now - self._synced_at < current_app.config["REVOCATION_SYNC_INTERVAL"]:
+            return
+        with self._lock:
+            if now - self._synced_at < current_app.config["REVOCATION_SYNC_INTERVAL"]:
+                return
+            # a Core select, a worker's first fetch can be a million rows
+            table = RevokedToken.__table__
+            rows = db.session.connection().execute(
+                select(table.c.jti, table.c.expires_at, table.c.effective_at, table.c.id)
+                .where(table.c.id > self._last_id, table.c.expires_at > int(time.time()))
+                .order_by(table.c.id)
+            ).all()
+            self._add((jti, expires_at, effective_at) for jti, expires_at, effective_at, _ in rows)
+            if rows:
+                self._last_id = rows[-1][3]
+            self._activate()
+
+            # an expired token fails the expiry check anyway, forget it
+            current_hour = int(time.time()) // 3600
+            for hour in [hour for hour in self._by_hour if hour < current_hour]:
+                self._revoked.difference_update(self._by_hour.pop(hour))
+            self._synced_at = now
+
+    def is_revoked(self, jti):
+        self.sync()
+        key = compact(jti)
+        if key in self._revoked:
+            return True
+        pending = self._pending.get(key)
+        return pending is not None and pending[0] <= time.time()
+
+    def revoke(self, jti, expires_at, grace=0):
+        """Revoke the token, effective in `grace` seconds, and commit.
+
+        False if it was revoked already and that has taken effect (a refresh
+        token used twice). A token revoked again within its grace is still
+        good, so that is True.
+        """
+        effective_at = int(time.time()) + grace if grace else None
+        try:
+            db.session.execute(insert(RevokedToken).values(jti=jti, expires_at=expires_at, effective_at=effective_at))
+            self._prune()
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # the first revocation decides, whichever worker made it
+            effective_at = db.session.execute(
+                select(RevokedToken.effective_at).where(RevokedToken.jti == jti)
+            ).scalar()
+            return effective_at is not None and effective_at > time.time()
+        with self._lock:
+            self._add([(jti, expires_at, effective_at)])
+        return True
+
+    def _prune(self):
+        # rows of expired tokens, every REVOCATION_PRUNE_INTERVAL, on a write anyway
+        now = time.monotonic()
+        if now - self._pruned_at >= current_app.config["REVOCATION_PRUNE_INTERVAL"]:
+            self._pruned_at = now
+            db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= int(time.time())))
+
+    def clear(self):
+        with self._lock:
+            self._revoked.clear()
+            self._by_hour.clear()
+            self._pending.clear()
+            self._last_id = 0
+            self._synced_at = float("-inf")
+
+
+revocation_store = RevocationStore()
+
+
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_data):
+    return revocation_store.is_revoked(jwt_data["jti"])
+
+
+@jwt.revoked_token_loader
+def revoked_token(jwt_header, jwt_data):
+    return jsonify({"error": "Token has been revoked"}), 401
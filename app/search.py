@@ -0,0 +1,135 @@
+import re
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import DDL, event, text
+from app import db
+from app.models import WEEKDAYS
+from app.pagination import MAX_PAGE_SIZE
+
+search_bp = Blueprint("search", __name__)
+
+# One FTS5 table for courses and classes. The rowid encodes the source row
+# (course id * 2, class id * 2 + 1) so the triggers can find an entry
+# without scanning the UNINDEXED columns. Class entries carry the course
+# name too, "yoga hall 3" should find the class.
+# The day is indexed by name, course_class only stores the weekday number.
+DAY_NAME = "CASE new.weekday " + " ".join(f"WHEN {i} THEN '{day}'" for i, day in enumerate(WEEKDAYS)) + " END"
+
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED, ref_id UNINDEXED, course_id UNINDEXED,
+        name, description, trainer, location, day_of_week,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS search_course_insert AFTER INSERT ON course BEGIN
+        INSERT INTO search_index (rowid, kind, ref_id, course_id, name, description)
+        VALUES (new.id * 2, 'course', new.id, new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_course_update AFTER UPDATE OF name, description ON course BEGIN
+        UPDATE search_index SET name = new.name, description = new.description WHERE rowid = old.id * 2;
+        UPDATE search_index SET name = new.name
+        WHERE rowid IN (SELECT id * 2 + 1 FROM course_class WHERE course_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_course_delete AFTER DELETE ON course BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_class_insert AFTER INSERT ON course_class BEGIN
+        INSERT INTO search_index (rowid, kind, ref_id, course_id, name, trainer, location, day_of_week)
+        VALUES (new.id * 2 + 1, 'class', new.id, new.course_id,
+                (SELECT name FROM course WHERE id = new.course_id), new.trainer, new.location, {DAY_NAME});
+    END""",
+    # not on available_spots, joins and leaves must not touch the index
+    f"""CREATE TRIGGER IF NOT EXISTS search_class_update
+    AFTER UPDATE OF course_id, trainer, location, weekday ON course_class BEGIN
+        UPDATE search_index SET course_id = new.course_id, trainer = new.trainer, location = new.location,
+            day_of_week = {DAY_NAME}, name = (SELECT name FROM course WHERE id = new.course_id)
+        WHERE rowid = old.id * 2 + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_class_delete AFTER DELETE ON course_class BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+
+# db.create_all() (benchmarks, fresh databases) gets the index as well,
+# migrated databases get it from the migration
+for statement in SEARCH_INDEX_DDL:
+    event.listen(db.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+# name, description, trainer, location, day_of_week - a hit in the name counts most
+RANK_WEIGHTS = "bm25(search_index, 0, 0, 0, 10.0, 2.0, 5.0, 5.0, 1.0)"
+
+SEARCH_HITS = f"""
+    SELECT kind, ref_id, course_id, name, trainer, location, day_of_week,
+           snippet(search_index, -1, '[', ']', '…', 12) AS snippet, {RANK_WEIGHTS} AS rank
+    FROM search_index
+    WHERE search_index MATCH :query {{kind_filter}}
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+"""
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(q):
+    # User input never reaches the FTS5 query syntax: every word becomes a
+    # quoted prefix term ("foot"* "hall"*), all of them have to match.
+    # A one letter prefix would expand to a large part of the vocabulary,
+    # those words have to match exactly.
+    words = TOKEN.findall(q)
+    return " ".join(f'"{word}"*' if len(word) > 1 else f'"{word}"' for word in words[:10])
+
+
+def search(q, kind=None, limit=20, offset=0):
+    """Ranked hits for `q`, one row more than `limit` to detect a next page."""
+    match = build_match_query(q)
+    if not match:
+        return []
+
+    statement = SEARCH_HITS.format(kind_filter="AND kind = :kind" if kind else "")
+    rows = db.session.execute(
+        text(statement), {"query": match, "kind": kind, "limit": limit + 1, "offset": offset}
+    ).mappings()
+    return [
+        {
+            "kind": row["kind"],
+            "id": row["ref_id"],
+            "course_id": row["course_id"],
+            "course_name": row["name"],
+            **({"trainer": row["trainer"], "location": row["location"], "day_of_week": row["day_of_week"]}
+               if row["kind"] == "class" else {}),
+            "snippet": row["snippet"],
+            # bm25() is lower for better matches
+            "score": round(-row["rank"], 4),
+        }
+        for row in rows
+    ]
+
+
+@search_bp.route("", methods=["GET"])
+@jwt_required()
+def search_catalog():
+    q = request.args.get("q", "").strip()
+    kind = request.args.get("kind")
+    if not q:
+        return jsonify({"error": "Query parameter q is required"}), 400
+    if kind not in (None, "course", "class"):
+        return jsonify({"error": "kind must be course or class"}), 400
+
+    # ranked results have no stable id order, the cursor is an offset
+    try:
+        limit = int(request.args.get("limit", 20))
+        offset = int(request.args.get("cursor") or 0)
+    except ValueError:
+        return jsonify({"error": "limit and cursor must be integers"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    if offset < 0:
+        return jsonify({"error": "cursor must not be negative"}), 400
+
+    hits = search(q, kind, limit, offset)
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = offset + limit
+
+    return jsonify({"items": hits, "next_cursor": next_cursor}), 200
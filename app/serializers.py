@@ -0,0 +1,45 @@
+from app import db
+from app.models import Course, CourseClass, user_classes
+
+
+def user_to_dict(user):
+    return {
+        "id": user.id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "phone_number": user.phone_number,
+        "role": user.role
+    }
+
+
+def class_to_dict(course_class):
+    return {
+        "id": course_class.id,
+        "day_of_week": course_class.day_of_week,
+        "time": course_class.time,
+        "duration_minutes": course_class.duration_minutes,
+        "location": course_class.location,
+        "trainer": course_class.trainer,
+        "available_spots": course_class.available_spots,
+        "total_max_spots": course_class.total_max_spots
+    }
+
+
+def course_class_to_dict(course_class, course_name):
+    return {"course_name": course_name, **class_to_dict(course_class)}
+
+
+def get_enrolled_classes(user_id):
+    # One joined query for the classes and their course names instead of
+    # walking user.classes and lazy-loading course_class.course per row
+    rows = (
+        db.session.query(CourseClass, Course.name)
+        .join(user_classes, user_classes.c.class_id == CourseClass.id)
+        .join(Course, Course.id == CourseClass.course_id)
+        .filter(user_classes.c.user_id == user_id)
+        .order_by(CourseClass.id)
+        .all()
+    )
+
+    return [course_class_to_dict(course_class, course_name) for course_class, course_name in rows]
@@ -0,0 +1,143 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import current_user, jwt_required
+from sqlalchemy import DDL, delete, event, select
+from app import db
+from app.models import Course, CourseClass, Tombstone, user_classes, utc_now
+from app.serializers import class_to_dict
+
+# All paths will have prefix: /api/sync
+sync_bp = Blueprint("sync", __name__)
+
+# SQLite's "now" in the format SQLAlchemy stores a DateTime in, so the
+# trigger timestamps compare right with the ones the app writes
+NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+# Deletes leave a tombstone. As triggers they also catch the classes and
+# enrollments ON DELETE CASCADE removes, and the bulk deletes of
+# delete-account and the importer.
+TOMBSTONE_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS tombstone_course AFTER DELETE ON course BEGIN
+        INSERT INTO tombstone (kind, ref_id, deleted_at) VALUES ('course', old.id, {NOW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tombstone_class AFTER DELETE ON course_class BEGIN
+        INSERT INTO tombstone (kind, ref_id, deleted_at) VALUES ('class', old.id, {NOW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tombstone_enrollment AFTER DELETE ON user_classes BEGIN
+        INSERT INTO tombstone (kind, ref_id, user_id, deleted_at) VALUES ('enrollment', old.class_id, old.user_id, {NOW});
+    END""",
+]
+
+for statement in TOMBSTONE_DDL:
+    # DDL() runs the statement through % formatting
+    event.listen(db.metadata, "after_create", DDL(statement.replace("%", "%%")).execute_if(dialect="sqlite"))
+
+_prune_lock = threading.Lock()
+_pruned_at = float("-inf")
+
+
+def format_timestamp(value):
+    return value.isoformat(timespec="microseconds") + "Z"
+
+
+def parse_cursor(value):
+    """The naive UTC datetime of a cursor, ValueError if it is not an ISO 8601 time."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def prune_tombstones(now):
+    # at most once per SYNC_PRUNE_INTERVAL per worker, it is a write
+    global _pruned_at
+    with _prune_lock:
+        if time.monotonic() - _pruned_at < current_app.config["SYNC_PRUNE_INTERVAL"]:
+            return
+        _pruned_at = time.monotonic()
+    retention = timedelta(days=current_app.config["SYNC_TOMBSTONE_DAYS"])
+    db.session.execute(delete(Tombstone).where(Tombstone.deleted_at < now - retention))
+    db.session.commit()
+
+
+@sync_bp.route("", methods=["GET"])
+@jwt_required()
+def get_changes():
+    """Courses, classes and enrollments changed since ?since=<cursor>, plus what was deleted.
+
+    Pass the "cursor" of the previous answer as since. Without one, or with
+    one older than the kept tombstones, the answer has everything and
+    "full": true - the client replaces its copy. Rows changed around the
+    cursor time can come twice: clients apply "deleted" first, then upsert
+    the rows by id. Users get their own enrollments, admins everyone's.
+    """
+    now = utc_now()
+    since = None
+    if request.args.get("since"):
+        try:
+            since = parse_cursor(request.args["since"])
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    config = current_app.config
+    prune_tombstones(now)
+    if since is not None and since < now - timedelta(days=config["SYNC_TOMBSTONE_DAYS"]):
+        # the tombstones of that time are gone
+        since = None
+
+    # A write that took its timestamp just before now may commit after
+    # this read, so the next cursor lies SYNC_LAG_SECONDS back
+    cursor = now - timedelta(seconds=config["SYNC_LAG_SECONDS"])
+
+    # in time order, so a delta is a range of the timestamp indexes
+    courses = Course.query.order_by(Course.updated_at, Course.id)
+    classes = CourseClass.query.order_by(CourseClass.updated_at, CourseClass.id)
+    enrollments = (
+        select(user_classes.c.user_id, user_classes.c.class_id, user_classes.c.created_at)
+        .order_by(user_classes.c.created_at)
+    )
+    tombstones = select(Tombstone.kind, Tombstone.ref_id, Tombstone.user_id).order_by(Tombstone.deleted_at)
+
+    if current_user.role != "admin":
+        enrollments = enrollments.where(user_classes.c.user_id == current_user.id)
+        tombstones = tombstones.where((Tombstone.kind != "enrollment") | (Tombstone.user_id == current_user.id))
+
+    if since is not None:
+        courses = courses.filter(Course.updated_at >= since)
+        classes = classes.filter(CourseClass.updated_at >= since)
+        enrollments = enrollments.where(user_classes.c.created_at >= since)
+        tombstones = tombstones.where(Tombstone.deleted_at >= since)
+
+    deleted = {"courses": [], "classes": [], "enrollments": []}
+    if since is not None:
+        for kind, ref_id, user_id in db.session.execute(tombstones):
+            if kind == "course":
+                deleted["courses"].append(ref_id)
+            elif kind == "class":
+                deleted["classes"].append(ref_id)
+            else:
+                deleted["enrollments"].append({"user_id": user_id, "class_id": ref_id})
+
+    return jsonify({
+        "courses": [{
+            "id": course.id,
+            "name": course.name,
+            "description": course.description,
+            "updated_at": format_timestamp(course.updated_at),
+        } for course in courses],
+        "classes": [{
+            **class_to_dict(course_class),
+            "course_id": course_class.course_id,
+            "updated_at": format_timestamp(course_class.updated_at),
+        } for course_class in classes],
+        "enrollments": [{
+            "user_id": user_id,
+            "class_id": class_id,
+            "enrolled_at": format_timestamp(enrolled_at),
+        } for user_id, class_id, enrolled_at in db.session.execute(enrollments)],
+        "deleted": deleted,
+        "full": since is None,
+        "cursor": format_timestamp(cursor),
+    }), 200
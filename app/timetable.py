@@ -0,0 +1,52 @@
+from sqlalchemy import DDL, event
+from app import db
+from app.models import Course, CourseClass, DEFAULT_CLASS_DURATION, MAX_CLASS_DURATION, user_classes
+
+# user_classes carries a copy of each class's schedule so a user's timetable
+# is an index range (ix_user_classes_timetable). SQLite triggers keep the
+# copy current, also for enrollments written by the importer or the seed.
+TIMETABLE_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS timetable_enroll AFTER INSERT ON user_classes BEGIN
+        UPDATE user_classes SET (weekday, start_minute, end_minute) = (
+            SELECT weekday, start_minute, start_minute + COALESCE(duration_minutes, {DEFAULT_CLASS_DURATION})
+            FROM course_class WHERE id = new.class_id
+        )
+        WHERE user_id = new.user_id AND class_id = new.class_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS timetable_reschedule
+    AFTER UPDATE OF weekday, start_minute, duration_minutes ON course_class BEGIN
+        UPDATE user_classes SET weekday = new.weekday, start_minute = new.start_minute,
+            end_minute = new.start_minute + COALESCE(new.duration_minutes, {DEFAULT_CLASS_DURATION})
+        WHERE class_id = new.id;
+    END""",
+]
+
+for statement in TIMETABLE_DDL:
+    event.listen(db.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def find_conflict(user_id, course_class):
+    """(CourseClass, course name) of another class of the user overlapping course_class, or None.
+
+    No class is longer than MAX_CLASS_DURATION, so only classes starting in
+    (start - MAX_CLASS_DURATION, end) can overlap - a bounded range of the
+    timetable index, however many classes the user has. Overlaps across
+    midnight are not detected.
+    """
+    start, end = course_class.start_minute, course_class.end_minute
+    return (
+        db.session.query(CourseClass, Course.name)
+        .select_from(user_classes)
+        .join(CourseClass, CourseClass.id == user_classes.c.class_id)
+        .join(Course, Course.id == CourseClass.course_id)
+        .filter(
+            user_classes.c.user_id == user_id,
+            user_classes.c.weekday == course_class.weekday,
+            user_classes.c.start_minute > start - MAX_CLASS_DURATION,
+            user_classes.c.start_minute < end,
+            user_classes.c.end_minute > start,
+            user_classes.c.class_id != course_class.id,
+        )
+        .order_by(user_classes.c.start_minute)
+        .first()
+    )
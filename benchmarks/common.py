@@ -0,0 +1,31 @@
+import os
+import tempfile
+from config import Config
+
+
+def make_app(db_path=None, **config):
+    """Create the real Flask app on a throwaway SQLite file.
+
+    Extra keyword arguments override Config attributes, e.g.
+    make_app(SQLITE_PRAGMAS={}) for an untuned database.
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="sportclub-bench-"), "bench.db")
+
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+    # the benchmarks measure the app, thousands of logins from one address
+    # would only measure the rate limiter
+    config.setdefault("RATELIMIT_ENABLED", False)
+    for name, value in config.items():
+        setattr(Config, name, value)
+
+    from app import create_app
+    return create_app(), db_path
+
+
+def auth_header(app, user_id, role="user"):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={"role": role})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,96 @@
+"""Fire concurrent joins at one class from several processes.
+
+    python -m benchmarks.join_stress --processes 8 --users 4000 --spots 500
+
+Every process drives its own app instance (like a gunicorn worker) against
+the same SQLite file. Afterwards the seat counter must match the
+enrollment table exactly: total_max_spots - available_spots == enrolled.
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from collections import Counter
+
+
+def seed(db_path, users, spots):
+    from benchmarks.common import make_app
+    from app import db
+    from app.models import Course, CourseClass, User
+
+    app, _ = make_app(db_path)
+    with app.app_context():
+        db.create_all()
+        course = Course(name="Stress", description="Stress test course")
+        db.session.add(course)
+        db.session.flush()
+        course_class = CourseClass(course_id=course.id, day_of_week="Monday", time="18:00",
+                                   location="Hall", trainer="Coach",
+                                   available_spots=spots, total_max_spots=spots)
+        db.session.add(course_class)
+        db.session.add_all(User(first_name=f"u{i}", email=f"u{i}@stress.test", password="x")
+                           for i in range(users))
+        db.session.commit()
+        return course_class.id
+
+
+def worker(db_path, class_id, user_ids, queue):
+    from benchmarks.common import make_app, auth_header
+
+    app, _ = make_app(db_path)
+    client = app.test_client()
+    statuses = Counter()
+    for user_id in user_ids:
+        # every user tries twice - the second attempt must be rejected
+        for _ in range(2):
+            response = client.post(f"/api/classes/{class_id}/join", headers=auth_header(app, user_id))
+            statuses[response.status_code] += 1
+    queue.put(statuses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--users", type=int, default=4000)
+    parser.add_argument("--spots", type=int, default=500)
+    args = parser.parse_args()
+
+    from benchmarks.common import make_app
+    _, db_path = make_app()
+    class_id = seed(db_path, args.users, args.spots)
+
+    queue = multiprocessing.Queue()
+    user_ids = list(range(1, args.users + 1))
+    processes = [
+        multiprocessing.Process(target=worker, args=(db_path, class_id, user_ids[i::args.processes], queue))
+        for i in range(args.processes)
+    ]
+
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    statuses = Counter()
+    for _ in processes:
+        statuses.update(queue.get())
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    import sqlite3
+    connection = sqlite3.connect(db_path)
+    available, total = connection.execute(
+        "SELECT available_spots, total_max_spots FROM course_class WHERE id = ?", (class_id,)).fetchone()
+    enrolled = connection.execute(
+        "SELECT COUNT(*) FROM user_classes WHERE class_id = ?", (class_id,)).fetchone()[0]
+
+    print(f"{sum(statuses.values())} join requests in {elapsed:.2f}s, status codes: {dict(statuses)}")
+    print(f"total_max_spots={total} available_spots={available} enrolled={enrolled}")
+
+    if total - available != enrolled or available < 0 or statuses[200] != enrolled:
+        print("FAIL: seat counter and enrollments disagree")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Drive the real app with concurrent clients and report latency as JSON.
+
+    python -m benchmarks.seed bench.db
+    python -m benchmarks.load bench.db --clients 8 --seconds 30 --output run.json
+    python -m benchmarks.load bench.db --compare run.json
+
+Every client thread loops over a weighted mix of the main routes (login,
+public catalog, my-classes, join+leave, class members) with its own
+synthetic user. The report has throughput, p50/p95/p99 latency and SQL
+statements per request for each route. --compare prints the change in
+p95 against an earlier report and exits non-zero if a route got slower
+than --tolerance.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks.seed import PASSWORD
+
+# route name -> (weight, endpoint names the route hits, for the SQL counts)
+MIX = {
+    "login": (1, ("auth.login",)),
+    "public_catalog": (10, ("courses.get_public_courses",)),
+    "my_classes": (5, ("auth.get_user_classes",)),
+    "join_leave": (4, ("classes.join_class", "classes.leave_class")),
+    "members": (2, ("classes.get_class_members",)),
+}
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_client(app, client_id, args, deadline, results):
+    from benchmarks.common import auth_header
+
+    rng = random.Random(args.seed + client_id)
+    client = app.test_client()
+    user_id = rng.randint(2, args.users)
+    user = auth_header(app, user_id)
+    admin = auth_header(app, 1, "admin")
+    routes = list(MIX)
+    weights = [MIX[name][0] for name in routes]
+
+    while time.time() < deadline:
+        route = rng.choices(routes, weights)[0]
+        class_id = rng.randint(1, args.classes)
+        started = time.perf_counter()
+
+        if route == "login":
+            response = client.post("/api/auth/login", json={"email": f"user{user_id}@bench.test",
+                                                            "password": PASSWORD})
+        elif route == "public_catalog":
+            response = client.get("/api/courses/public")
+        elif route == "my_classes":
+            response = client.get("/api/auth/my-classes", headers=user)
+        elif route == "join_leave":
+            response = client.post(f"/api/classes/{class_id}/join", headers=user)
+            if response.status_code == 200:
+                response = client.delete(f"/api/classes/{class_id}/leave", headers=user)
+        else:
+            response = client.get(f"/api/classes/{class_id}/members", headers=admin)
+
+        elapsed = time.perf_counter() - started
+        # a full class (400) or an existing enrollment (409) is a normal answer
+        ok = response.status_code < 500
+        results[route].append((elapsed, ok))
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    from benchmarks.common import make_app
+    from app.metrics import request_metrics
+
+    app, _ = make_app(args.db_path, METRICS_ENABLED=True)
+    request_metrics.reset()
+    results = defaultdict(list)
+    deadline = time.time() + args.seconds
+
+    threads = [threading.Thread(target=run_client, args=(app, i, args, deadline, results))
+               for i in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    sql = defaultdict(lambda: [0, 0])
+    for (endpoint, _, _), value in request_metrics.snapshot().items():
+        sql[endpoint][0] += value["count"]
+        sql[endpoint][1] += value["sql_count"]
+
+    routes = {}
+    for route, samples in sorted(results.items()):
+        latencies = [elapsed_s * 1000 for elapsed_s, _ in samples]
+        endpoints = MIX[route][1]
+        requests = sum(sql[e][0] for e in endpoints)
+        routes[route] = {
+            "requests": len(samples),
+            "errors": sum(not ok for _, ok in samples),
+            "throughput_rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "sql_per_request": round(sum(sql[e][1] for e in endpoints) / requests, 2) if requests else None,
+        }
+
+    return {
+        "revision": git_revision(),
+        "clients": args.clients,
+        "seconds": round(elapsed, 2),
+        "total_rps": round(sum(len(s) for s in results.values()) / elapsed, 1),
+        "routes": routes,
+    }
+
+
+def compare(report, baseline, tolerance):
+    regressions = []
+    for route, now in report["routes"].items():
+        before = baseline["routes"].get(route)
+        if not before or not before["p95_ms"]:
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+        print(f"{route:15} p95 {before['p95_ms']:8.2f} -> {now['p95_ms']:8.2f} ms ({change:+.0%})", file=sys.stderr)
+        if change > tolerance:
+            regressions.append(route)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_path", help="database seeded with benchmarks.seed")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--users", type=int, default=100000, help="users in the seeded database")
+    parser.add_argument("--classes", type=int, default=20000, help="classes in the seeded database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--compare", help="earlier report to compare p95 latency against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"p95 regression in: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
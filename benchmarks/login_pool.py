@@ -0,0 +1,99 @@
+"""Login throughput and tail latency versus the password hashing pool size.
+
+    python -m benchmarks.login_pool --pool-sizes 0,1,2,4 --clients 8 --seconds 10
+
+For each pool size (0 = hash on the request thread) --clients threads log
+in as fast as they can while one more thread reads the public catalog
+(cache off), which shows what hashing does to the other requests of the
+same worker. The hash pool can only use as many cores as the machine has,
+so run it where os.cpu_count() is at least the largest pool size.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+from benchmarks.load import percentile
+from benchmarks.seed import PASSWORD, seed
+
+
+def login_client(app, user_id, deadline, samples):
+    client = app.test_client()
+    while time.time() < deadline:
+        started = time.perf_counter()
+        response = client.post("/api/auth/login", json={"email": f"user{user_id}@bench.test", "password": PASSWORD})
+        samples.append((time.perf_counter() - started, response.status_code))
+
+
+def catalog_client(app, deadline, samples):
+    client = app.test_client()
+    while time.time() < deadline:
+        started = time.perf_counter()
+        response = client.get("/api/courses/public")
+        samples.append((time.perf_counter() - started, response.status_code))
+
+
+def run(app, pool_size, clients, seconds):
+    from app.passwords import password_hasher
+
+    app.config["PASSWORD_HASH_WORKERS"] = pool_size
+    app.config["PASSWORD_HASH_MAX_PENDING"] = max(clients, 1)
+    password_hasher.shutdown()
+    if pool_size:
+        # start the pool processes outside the measurement
+        with app.test_client() as client:
+            for _ in range(pool_size):
+                client.post("/api/auth/login", json={"email": "user2@bench.test", "password": PASSWORD})
+
+    logins, reads = [], []
+    deadline = time.time() + seconds
+    threads = [threading.Thread(target=login_client, args=(app, 2 + i, deadline, logins)) for i in range(clients)]
+    threads.append(threading.Thread(target=catalog_client, args=(app, deadline, reads)))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    login_ms = [s * 1000 for s, _ in logins]
+    read_ms = [s * 1000 for s, _ in reads]
+    return {
+        "pool_size": pool_size,
+        "logins_per_second": round(len(logins) / elapsed, 1),
+        "login_errors": sum(status != 200 for _, status in logins),
+        "login_p50_ms": round(percentile(login_ms, 50), 1),
+        "login_p95_ms": round(percentile(login_ms, 95), 1),
+        "login_p99_ms": round(percentile(login_ms, 99), 1),
+        "catalog_reads_per_second": round(len(reads) / elapsed, 1),
+        "catalog_p95_ms": round(percentile(read_ms, 95), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pool-sizes", default="0,1,2,4")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    from benchmarks.common import make_app
+    from app.passwords import password_hasher
+
+    _, db_path = make_app()
+    seed(db_path, users=args.clients + 10, courses=50, classes=200)
+    app, _ = make_app(db_path, CATALOG_CACHE_TTL=0)
+
+    print(f"cpu_count={os.cpu_count()}")
+    results = []
+    for pool_size in (int(size) for size in args.pool_sizes.split(",")):
+        results.append(run(app, pool_size, args.clients, args.seconds))
+        print(json.dumps(results[-1]))
+    password_hasher.shutdown()
+
+    print(json.dumps({"cpu_count": os.cpu_count(), "runs": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""JSON serialization time and response sizes, stdlib json vs orjson, plain vs compressed.
+
+    python -m benchmarks.payloads --courses 2000 --classes 20000 --repeat 50
+
+Uses three payloads:
+- the full public catalog
+- a 100 class page of /api/classes
+- a page of the roster of the largest class
+
+For each it times Flask's stdlib provider against OrjsonProvider building
+the response, and reports the body size raw, gzipped and brotli'd (when
+Brotli is installed). Last, it times GET /api/courses/public with
+Accept-Encoding: gzip against the same body gzipped on every request,
+which is what the catalog cache saves.
+"""
+import argparse
+import gzip
+import json
+import statistics
+import time
+from flask.json.provider import DefaultJSONProvider
+from benchmarks.common import auth_header, make_app
+from benchmarks.seed import seed
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--classes", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    _, db_path = make_app()
+    seed(db_path, users=args.users, courses=args.courses, classes=args.classes)
+    app, _ = make_app(db_path, CATALOG_CACHE_TTL=3600)
+
+    from app.compression import brotli, compress
+    from app.jsonprovider import OrjsonProvider
+
+    from app import db
+    from app.models import user_classes
+    from sqlalchemy import func, select
+
+    with app.app_context():
+        largest_class = db.session.execute(
+            select(user_classes.c.class_id).group_by(user_classes.c.class_id)
+            .order_by(func.count().desc()).limit(1)
+        ).scalar()
+
+    client = app.test_client()
+    admin = auth_header(app, 1, role="admin")
+    payloads = {
+        "catalog": client.get("/api/courses/public").get_json(),
+        "classes_page": client.get("/api/classes?limit=100", headers=admin).get_json(),
+        "roster_page": client.get(f"/api/classes/{largest_class}/members?limit=100", headers=admin).get_json(),
+    }
+
+    report = {}
+    with app.app_context():
+        stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+        for name, payload in payloads.items():
+            body = fast.response(payload).get_data()
+            row = {
+                "stdlib_ms": timed(lambda: stdlib.response(payload).get_data(), args.repeat),
+                "orjson_ms": timed(lambda: fast.response(payload).get_data(), args.repeat),
+                "stdlib_bytes": len(stdlib.response(payload).get_data()),
+                "orjson_bytes": len(body),
+                "gzip_bytes": len(compress(body, "gzip")),
+                "gzip_ms": timed(lambda: compress(body, "gzip"), args.repeat),
+            }
+            if brotli is not None:
+                row["br_bytes"] = len(compress(body, "br"))
+                row["br_ms"] = timed(lambda: compress(body, "br"), args.repeat)
+            report[name] = row
+            print(json.dumps({"payload": name, **row}))
+
+    # per request: cached gzip body vs compressing the same body every time
+    headers = {"Accept-Encoding": "gzip"}
+    client.get("/api/courses/public", headers=headers)
+    cached = timed(lambda: client.get("/api/courses/public", headers=headers), args.repeat)
+    body = client.get("/api/courses/public").get_data()
+    with app.app_context():
+        per_request = timed(lambda: (client.get("/api/courses/public"), gzip.compress(body, 6, mtime=0)), args.repeat)
+    report["catalog_request"] = {"precompressed_ms": cached, "compressed_per_request_ms": per_request}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
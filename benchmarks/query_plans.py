@@ -0,0 +1,99 @@
+"""Check that every endpoint's SQL is served by an index.
+
+    python -m benchmarks.query_plans
+
+Drives the main routes against a seeded database, records every
+statement they issue and runs EXPLAIN QUERY PLAN on it. Exits non-zero
+if a statement falls back to a full table scan that is not expected
+(listing the whole catalog has to read every course, nothing else should).
+"""
+import sys
+from datetime import datetime, timezone
+from sqlalchemy import event
+from benchmarks.seed import PASSWORD, seed
+
+# Tables an endpoint is allowed to read in full
+EXPECTED_SCANS = {
+    "GET /api/courses/public": {"course"},
+    # the FTS5 table shows up as "SCAN search_index VIRTUAL TABLE INDEX ..."
+    "GET /api/search?q=football hall": {"search_index"},
+}
+
+
+def scenario(app):
+    from benchmarks.common import auth_header
+
+    admin = auth_header(app, 1, "admin")
+    user = auth_header(app, 2)
+    # after the seed, only what the scenario itself changes
+    since = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return [
+        ("POST", "/api/auth/login", None, {"email": "user1@bench.test", "password": PASSWORD}),
+        ("GET", "/api/courses/public", None, None),
+        ("POST", "/api/classes/1/join", user, None),
+        ("POST", "/api/classes/2/join", user, None),
+        ("GET", "/api/auth/my-classes", user, None),
+        ("GET", "/api/courses/my-classes", user, None),
+        ("GET", "/api/courses/1/classes", user, None),
+        ("GET", "/api/search?q=football hall", user, None),
+        ("GET", "/api/classes?weekday=tue&from=17:00&to=19:00&free=true&limit=20", user, None),
+        ("GET", "/api/classes?from=17:00&to=19:00", user, None),
+        ("GET", "/api/classes/1/members", admin, None),
+        ("DELETE", "/api/classes/1/leave", user, None),
+        ("POST", "/api/courses/", admin, {"name": "Volleyball 1", "description": "duplicate"}),
+        ("PUT", "/api/courses/1/classes/1", admin, {"trainer": "New coach"}),
+        ("DELETE", "/api/courses/1/classes/1", admin, None),
+        ("DELETE", "/api/courses/2", admin, None),
+        ("GET", f"/api/sync?since={since}", user, None),
+        ("GET", f"/api/sync?since={since}", admin, None),
+        ("DELETE", "/api/auth/delete-account", user, None),
+    ]
+
+
+def full_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    # rows are (id, parent, notused, detail), e.g. "SCAN course" or
+    # "SEARCH course_class USING INDEX ix_course_class_course_id (course_id=?)"
+    return {row[3].split()[1] for row in plan if row[3].startswith("SCAN ")}
+
+
+def main():
+    from benchmarks.common import make_app
+    from app import db
+
+    # big enough that the planner's choices match a real club
+    _, db_path = make_app()
+    seed(db_path, users=2000, courses=50, classes=500)
+    app, _ = make_app(db_path)
+    client = app.test_client()
+
+    recorded = []
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, parameters, context, executemany:
+                     recorded.append((statement, parameters)))
+
+    failures = 0
+    for method, url, headers, body in scenario(app):
+        recorded.clear()
+        response = client.open(url, method=method, headers=headers, json=body)
+        endpoint = f"{method} {url}"
+        allowed = EXPECTED_SCANS.get(endpoint, set())
+
+        with app.app_context(), db.engine.connect() as connection:
+            for statement, parameters in list(recorded):
+                scans = full_scans(connection, statement, parameters) - allowed
+                if scans:
+                    failures += 1
+                    print(f"FULL SCAN of {', '.join(sorted(scans))} in {endpoint}:\n    {statement}")
+
+        print(f"{endpoint} -> {response.status_code}, {len(recorded)} statements")
+
+    if failures:
+        print(f"FAIL: {failures} statements fall back to a full table scan")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Per-request cost of the token revocation check with up to 1M revoked tokens.
+
+    python -m benchmarks.revocation --revoked 0,100000,1000000 --requests 2000
+
+For each size the revoked_token table is filled with that many unexpired
+tokens. A fresh RevocationStore then loads them once, the way a worker
+does on its first authenticated request. Afterwards the script measures
+is_revoked() on its own, the periodic fetch of newly revoked tokens, an
+authenticated GET /api/auth/my-classes, and the memory the in-process
+set takes.
+"""
+import argparse
+import json
+import sqlite3
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from benchmarks.common import auth_header, make_app
+from benchmarks.seed import chunks, seed
+
+
+def fill(db_path, count):
+    expires_at = int(time.time()) + 7 * 24 * 3600
+    connection = sqlite3.connect(db_path)
+    with connection:
+        connection.execute("DELETE FROM revoked_token")
+        for chunk in chunks([(str(uuid.uuid4()), expires_at - i % 86400) for i in range(count)]):
+            connection.executemany("INSERT INTO revoked_token (jti, expires_at) VALUES (?, ?)", chunk)
+    connection.close()
+
+
+def run(app, db_path, count, requests):
+    from app.revocation import RevocationStore, revocation_store
+
+    fill(db_path, count)
+    probe = str(uuid.uuid4())
+
+    with app.app_context():
+        store = RevocationStore()
+        started = time.perf_counter()
+        store.is_revoked(probe)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        # again with tracemalloc on, it slows the load down a lot
+        tracemalloc.start()
+        loaded = RevocationStore()
+        loaded.is_revoked(probe)
+        memory_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+        del loaded
+
+        started = time.perf_counter()
+        for _ in range(requests * 50):
+            store.is_revoked(probe)
+        lookup_us = (time.perf_counter() - started) / (requests * 50) * 1e6
+
+        # what a worker pays once per REVOCATION_SYNC_INTERVAL when nothing new was revoked
+        syncs = []
+        for _ in range(100):
+            store._synced_at = float("-inf")
+            started = time.perf_counter()
+            store.is_revoked(probe)
+            syncs.append((time.perf_counter() - started) * 1000)
+
+    # the app's own store, warmed outside the measurement
+    revocation_store.clear()
+    client = app.test_client()
+    headers = auth_header(app, 2)
+    client.get("/api/auth/my-classes", headers=headers)
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        assert client.get("/api/auth/my-classes", headers=headers).status_code == 200
+        samples.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "revoked": count,
+        "initial_load_ms": round(load_ms, 1),
+        "memory_mb": round(memory_mb, 1),
+        "is_revoked_us": round(lookup_us, 2),
+        "sync_ms": round(statistics.median(syncs), 3),
+        "request_p50_ms": round(statistics.median(samples), 3),
+        "request_p95_ms": round(statistics.quantiles(samples, n=20)[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--revoked", default="0,100000,1000000")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    _, db_path = make_app()
+    seed(db_path, users=100, courses=20, classes=100)
+    app, _ = make_app(db_path)
+
+    results = []
+    for count in (int(count) for count in args.revoked.split(",")):
+        results.append(run(app, db_path, count, args.requests))
+        print(json.dumps(results[-1]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
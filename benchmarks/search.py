@@ -0,0 +1,91 @@
+"""Compare /api/search (FTS5) with a LIKE scan over courses and classes.
+
+    python -m benchmarks.search --courses 2000 --classes 20000 --repeat 20
+
+Both sides answer the same queries on a seeded database: FTS5 through
+app.search.search(), the baseline with the query a search box would
+otherwise need - every word LIKE '%word%' against the course name and
+description and the class trainer and location. Ranking needs every
+match, so the baseline reads all of them as well (that is also what the
+browser does today with the whole catalog).
+"""
+import argparse
+import json
+import statistics
+import time
+from sqlalchemy import text
+from benchmarks.seed import seed
+
+QUERIES = ["football", "coach 42", "hall 7", "yoga", "synthetic tennis course", "volley", "rugby coach 1"]
+
+LIKE_COURSES = """
+    SELECT id FROM course WHERE {conditions} ORDER BY id
+"""
+LIKE_CLASSES = """
+    SELECT course_class.id FROM course_class JOIN course ON course.id = course_class.course_id
+    WHERE {conditions} ORDER BY course_class.id
+"""
+
+
+def like_search(session, q):
+    words = q.split()
+    params = {f"w{i}": f"%{word}%" for i, word in enumerate(words)}
+    courses = " AND ".join(f"(course.name LIKE :w{i} OR course.description LIKE :w{i})" for i in range(len(words)))
+    classes = " AND ".join(
+        f"(course.name LIKE :w{i} OR course.description LIKE :w{i} "
+        f"OR course_class.trainer LIKE :w{i} OR course_class.location LIKE :w{i})"
+        for i in range(len(words))
+    )
+    hits = session.execute(text(LIKE_COURSES.format(conditions=courses)), params).all()
+    hits += session.execute(text(LIKE_CLASSES.format(conditions=classes)), params).all()
+    return hits
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--classes", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    from benchmarks.common import make_app
+    from app import db
+    from app.search import search
+
+    _, db_path = make_app()
+    print(seed(db_path, users=args.users, courses=args.courses, classes=args.classes))
+    app, _ = make_app(db_path)
+
+    report = {}
+    with app.app_context():
+        indexed = db.session.execute(text("SELECT COUNT(*) FROM search_index")).scalar()
+        print(f"search_index: {indexed} rows")
+
+        for q in QUERIES:
+            fts_hits, fts = timed(lambda: search(q, limit=args.limit), args.repeat)
+            like_hits, like = timed(lambda: like_search(db.session, q), args.repeat)
+            report[q] = {
+                "fts_ms": round(statistics.median(fts), 3),
+                "like_ms": round(statistics.median(like), 3),
+                "speedup": round(statistics.median(like) / statistics.median(fts), 1),
+                "fts_hits": len(fts_hits), "like_hits": len(like_hits),
+            }
+            print(f"{q!r:28} fts {report[q]['fts_ms']:8.3f} ms   like {report[q]['like_ms']:8.3f} ms"
+                  f"   x{report[q]['speedup']}")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Seed a synthetic sports club into a SQLite file.
+
+    python -m benchmarks.seed bench.db --users 100000 --courses 2000 --classes 20000
+
+Class popularity follows a Zipf-like curve and every user enrolls in a
+handful of classes (geometric, mean --mean-enrollments), capped by each
+class's capacity, so rosters look like a real club: a few full classes
+and a long tail of quiet ones. The same --seed gives the same club.
+
+User 1 is an admin; every user's password is PASSWORD.
+"""
+import argparse
+import itertools
+import random
+import time
+from werkzeug.security import generate_password_hash
+
+PASSWORD = "bench-password"
+SPORTS = ("Football", "Volleyball", "Basketball", "Handball", "Tennis", "Rugby", "Swimming", "Yoga")
+CHUNK = 10000
+
+
+def chunks(rows):
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+
+def seed(db_path, users=100000, courses=2000, classes=20000, mean_enrollments=3.0, seed_value=42):
+    from benchmarks.common import make_app
+    from sqlalchemy import insert
+    from app import db
+    from app.models import Course, CourseClass, User, user_classes, utc_now
+
+    rng = random.Random(seed_value)
+    app, db_path = make_app(db_path)
+    started = time.perf_counter()
+    now = utc_now()
+    # hashing is deliberately slow, every synthetic user shares one hash
+    password = generate_password_hash(PASSWORD, method=app.config["PASSWORD_HASH_METHOD"])
+
+    with app.app_context():
+        db.create_all()
+
+        user_rows = [{
+            "id": i, "first_name": f"User{i}", "last_name": f"Synthetic{i % 1000}",
+            "email": f"user{i}@bench.test", "password": password, "phone_number": f"+49{i:09d}",
+            "role": "admin" if i == 1 else "user", "created_at": now, "updated_at": now,
+        } for i in range(1, users + 1)]
+        for rows in chunks(user_rows):
+            db.session.execute(insert(User), rows)
+
+        course_rows = [{
+            "id": i, "name": f"{SPORTS[i % len(SPORTS)]} {i}",
+            "description": f"Synthetic {SPORTS[i % len(SPORTS)].lower()} course number {i}.",
+            "created_at": now, "updated_at": now,
+        } for i in range(1, courses + 1)]
+        for rows in chunks(course_rows):
+            db.session.execute(insert(Course), rows)
+
+        capacity = [rng.choice((8, 12, 16, 20, 24, 30)) for _ in range(classes)]
+        # Zipf-like popularity: class k is picked with weight 1 / k^0.8
+        order = list(range(classes))
+        rng.shuffle(order)
+        weights = [0.0] * classes
+        for rank, index in enumerate(order, start=1):
+            weights[index] = 1 / rank ** 0.8
+
+        cum_weights = list(itertools.accumulate(weights))
+        enrolled = [0] * classes
+        enrollment_rows = []
+        for user_id in range(1, users + 1):
+            wanted = 0
+            while rng.random() > 1 / (mean_enrollments + 1):
+                wanted += 1
+            for index in set(rng.choices(range(classes), cum_weights=cum_weights, k=wanted)):
+                if enrolled[index] < capacity[index]:
+                    enrolled[index] += 1
+                    enrollment_rows.append({"user_id": user_id, "class_id": index + 1, "created_at": now})
+
+        class_rows = [{
+            "id": i + 1, "course_id": i % courses + 1, "weekday": i % 7,
+            "start_minute": rng.randint(7, 21) * 60 + rng.choice((0, 15, 30, 45)),
+            "location": f"Hall {rng.randint(1, 40)}", "trainer": f"Coach {rng.randint(1, 500)}",
+            "available_spots": capacity[i] - enrolled[i], "total_max_spots": capacity[i],
+            "created_at": now, "updated_at": now,
+        } for i in range(classes)]
+        for rows in chunks(class_rows):
+            db.session.execute(insert(CourseClass), rows)
+        for rows in chunks(enrollment_rows):
+            db.session.execute(insert(user_classes), rows)
+
+        db.session.commit()
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+
+    return {
+        "db_path": db_path, "users": users, "courses": courses, "classes": classes,
+        "enrollments": len(enrollment_rows), "full_classes": sum(e == c for e, c in zip(enrolled, capacity)),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("db_path")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--classes", type=int, default=20000)
+    parser.add_argument("--mean-enrollments", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(seed(args.db_path, args.users, args.courses, args.classes, args.mean_enrollments, args.seed))
+
+
+if __name__ == "__main__":
+    main()
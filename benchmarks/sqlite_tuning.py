@@ -0,0 +1,118 @@
+"""Compare catalog read throughput during concurrent joins, untuned vs tuned SQLite.
+
+    python -m benchmarks.sqlite_tuning --readers 4 --writers 4 --seconds 10
+
+"untuned" runs with the SQLite defaults (rollback journal, no pragmas,
+default engine options), "tuned" with Config.SQLITE_PRAGMAS and
+Config.SQLALCHEMY_ENGINE_OPTIONS. The catalog cache is disabled so every
+read reaches the database.
+"""
+import argparse
+import json
+import multiprocessing
+import time
+from collections import Counter
+
+from config import Config
+
+PROFILES = {
+    "untuned": {"SQLITE_PRAGMAS": {}, "SQLALCHEMY_ENGINE_OPTIONS": {}},
+    "tuned": {"SQLITE_PRAGMAS": Config.SQLITE_PRAGMAS,
+              "SQLALCHEMY_ENGINE_OPTIONS": Config.SQLALCHEMY_ENGINE_OPTIONS},
+}
+
+
+def seed(profile, users):
+    from benchmarks.common import make_app
+    from app import db
+    from app.models import Course, CourseClass, User
+
+    app, db_path = make_app(CATALOG_CACHE_TTL=0, **PROFILES[profile])
+    with app.app_context():
+        db.create_all()
+        for c in range(20):
+            course = Course(name=f"Course {c}", description="Benchmark course")
+            db.session.add(course)
+            db.session.flush()
+            db.session.add_all(CourseClass(course_id=course.id, day_of_week="Monday", time="18:00",
+                                           location="Hall", trainer="Coach",
+                                           available_spots=users, total_max_spots=users)
+                               for _ in range(10))
+        db.session.add_all(User(first_name=f"u{i}", email=f"u{i}@bench.test", password="x")
+                           for i in range(users))
+        db.session.commit()
+    return db_path
+
+
+def reader(profile, db_path, deadline, queue):
+    from benchmarks.common import make_app
+
+    app, _ = make_app(db_path, CATALOG_CACHE_TTL=0, **PROFILES[profile])
+    client = app.test_client()
+    statuses = Counter()
+    while time.time() < deadline:
+        statuses[f"read {client.get('/api/courses/public').status_code}"] += 1
+    queue.put(statuses)
+
+
+def writer(profile, db_path, deadline, user_ids, queue):
+    from benchmarks.common import make_app, auth_header
+
+    app, _ = make_app(db_path, CATALOG_CACHE_TTL=0, **PROFILES[profile])
+    client = app.test_client()
+    headers = [auth_header(app, user_id) for user_id in user_ids]
+    statuses = Counter()
+    i = 0
+    while time.time() < deadline:
+        h = headers[i % len(headers)]
+        class_id = i % 200 + 1
+        statuses[f"join {client.post(f'/api/classes/{class_id}/join', headers=h).status_code}"] += 1
+        statuses[f"leave {client.delete(f'/api/classes/{class_id}/leave', headers=h).status_code}"] += 1
+        i += 1
+    queue.put(statuses)
+
+
+def run(profile, args):
+    db_path = seed(profile, args.users)
+    deadline = time.time() + args.seconds
+    queue = multiprocessing.Queue()
+    user_ids = list(range(1, args.users + 1))
+
+    processes = [multiprocessing.Process(target=reader, args=(profile, db_path, deadline, queue))
+                 for _ in range(args.readers)]
+    processes += [multiprocessing.Process(target=writer,
+                                          args=(profile, db_path, deadline, user_ids[i::args.writers], queue))
+                  for i in range(args.writers)]
+    for process in processes:
+        process.start()
+    statuses = Counter()
+    for _ in processes:
+        statuses.update(queue.get())
+    for process in processes:
+        process.join()
+
+    reads = sum(n for key, n in statuses.items() if key.startswith("read"))
+    return {
+        "profile": profile,
+        "reads_per_second": round(statuses["read 200"] / args.seconds, 1),
+        "failed_reads": reads - statuses["read 200"],
+        "joins_per_second": round(statuses["join 200"] / args.seconds, 1),
+        "failed_writes": sum(n for key, n in statuses.items()
+                             if key.startswith(("join", "leave")) and key.split()[1] == "500"),
+        "status_codes": dict(statuses),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps([run(profile, args) for profile in PROFILES], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Fan seat updates out to many simulated /api/classes/stream subscribers.
+
+    python -m benchmarks.sse_fanout --subscribers 500 --updates 20000
+
+Each subscriber is a thread consuming its own SSE generator (the same one
+the endpoint returns). One extra subscriber with a small buffer never
+reads, to check that it stays bounded and gets told to resync. Every fast subscriber must end up with the
+final seat count of every class.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+from app.events import seat_broker, sse_stream
+
+
+def consume(subscriber, expected, seen, done):
+    for chunk in sse_stream(subscriber, heartbeat=0.05):
+        if chunk.startswith("data: "):
+            event = json.loads(chunk[len("data: "):])
+            seen[event["class_id"]] = event["available_spots"]
+        if done.is_set() and seen == expected:
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--classes", type=int, default=50)
+    parser.add_argument("--buffer", type=int, default=256, help="per-subscriber buffer (>= --classes)")
+    parser.add_argument("--slow-buffer", type=int, default=16)
+    args = parser.parse_args()
+
+    expected = {}
+    done = threading.Event()
+    results = [{} for _ in range(args.subscribers)]
+    threads = [
+        threading.Thread(target=consume, args=(seat_broker.subscribe(args.buffer), expected, seen, done),
+                         daemon=True)
+        for seen in results
+    ]
+    slow = seat_broker.subscribe(args.slow_buffer)
+
+    for thread in threads:
+        thread.start()
+
+    started = time.perf_counter()
+    for i in range(args.updates):
+        class_id = i % args.classes + 1
+        expected[class_id] = i
+        seat_broker.publish(class_id, i)
+    publish_time = time.perf_counter() - started
+    done.set()
+    # one last round so consumers that are idle wake up and compare
+    for class_id, spots in list(expected.items()):
+        seat_broker.publish(class_id, spots)
+
+    for thread in threads:
+        thread.join(timeout=30)
+    delivered = time.perf_counter() - started
+
+    complete = sum(seen == expected for seen in results)
+    print(f"{args.updates} updates to {args.subscribers} subscribers: "
+          f"published in {publish_time:.2f}s ({args.updates / publish_time:.0f}/s), "
+          f"all delivered after {delivered:.2f}s")
+    print(f"subscribers with the final state: {complete}/{args.subscribers}, "
+          f"slow subscriber buffer: {len(slow.pending)} (max {args.slow_buffer}), overflowed={slow.overflowed}")
+
+    if complete != args.subscribers or len(slow.pending) > args.slow_buffer or not slow.overflowed:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Import and startup time of the app, and the first requests after boot.
+
+    python -m benchmarks.startup --runs 5 --top 15
+
+Every run is a fresh interpreter, so nothing is cached in-process. The
+run reports the time to `import app`, the time for create_app() and the
+latency of the first /healthz, /healthz?deep=1 and /api/courses/public.
+It does this cold and again after warm_up() has run, then lists the
+slowest imports from `python -X importtime`.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import make_app
+from benchmarks.seed import seed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter, prints one JSON line
+PROBE = """
+import json, os, sys, time
+started = time.perf_counter()
+from benchmarks.common import make_app
+import app
+imported = time.perf_counter()
+flask_app, _ = make_app(os.environ["BENCH_DB"], CATALOG_CACHE_TTL=60, WARMUP_ON_START=False)
+created = time.perf_counter()
+if sys.argv[1] == "warm":
+    from app.health import warm_up
+    warm_up(flask_app)
+client = flask_app.test_client()
+result = {"import_ms": (imported - started) * 1000, "create_app_ms": (created - imported) * 1000}
+for name, path in (("healthz_ms", "/healthz"), ("healthz_deep_ms", "/healthz?deep=1"),
+                   ("catalog_ms", "/api/courses/public")):
+    t = time.perf_counter()
+    assert client.get(path).status_code == 200, path
+    result[name] = (time.perf_counter() - t) * 1000
+print(json.dumps(result))
+"""
+
+
+def probe(db_path, mode):
+    output = subprocess.run([sys.executable, "-c", PROBE, mode], cwd=ROOT, check=True, capture_output=True,
+                            text=True, env=dict(os.environ, BENCH_DB=db_path)).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def import_costs(top):
+    # -X importtime writes "import time: self [us] | cumulative | imported package" to stderr
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT,
+                            check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2].rstrip()
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            # app itself and what it imports directly, the cumulative time includes their submodules
+            if depth <= 1:
+                rows.append((int(parts[1]), name.strip()))
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in sorted(rows, reverse=True)[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    _, db_path = make_app()
+    seed(db_path, users=50, courses=200, classes=1000)
+
+    results = {}
+    for mode in ("cold", "warm"):
+        samples = [probe(db_path, mode) for _ in range(args.runs)]
+        results[mode] = {name: round(statistics.median(s[name] for s in samples), 2) for name in samples[0]}
+        print(json.dumps({"mode": mode, **results[mode]}))
+
+    results["slowest_imports"] = import_costs(args.top)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,126 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 
 class Config:
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(BASE_DIR, 'database.db')}"
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'database.db')}")
     # Flask-SQLAlchemy tracks changes to objects by default (which uses memory).
     # This is unnecessary for this project
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Passed to create_engine(). Every gunicorn worker keeps its own pool,
+    # "timeout" is how long sqlite3 waits for a lock before failing.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": True,
+        "connect_args": {"timeout": 15},
+    }
+    # Applied to every new SQLite connection (see create_app).
+    # WAL lets readers run while a join is being written, busy_timeout makes
+    # concurrent writers wait instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 15000)),
+        "cache_size": -16000,  # negative = KiB, i.e. 16 MB page cache
+        "mmap_size": 128 * 1024 * 1024,
+        # SQLite ignores foreign keys (and their ON DELETE CASCADE) without this
+        "foreign_keys": "ON",
+    }
 
     SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt_secret_key")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+    # Revoked tokens (app/revocation.py): seconds between fetches of the
+    # tokens other workers revoked, and between deletes of expired rows
+    REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", 1))
+    REVOCATION_PRUNE_INTERVAL = int(os.getenv("REVOCATION_PRUNE_INTERVAL", 3600))
+    # A refresh token is spent by its refresh, but may be used again for
+    # this many seconds - two tabs (or React StrictMode's double effect)
+    # refreshing with the same token must not log the user out
+    REFRESH_REUSE_GRACE = int(os.getenv("REFRESH_REUSE_GRACE", 10))
+
+    # Seconds the public course catalog is served from the in-process cache.
+    # Writes in this worker invalidate it immediately, the TTL bounds how
+    # stale other workers can be.
+    CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", 5))
+
+    # /api/sync: the next cursor lags this far behind the response, longer
+    # than a write can wait for the SQLite lock (busy_timeout) between
+    # taking its timestamp and committing
+    SYNC_LAG_SECONDS = int(os.getenv("SYNC_LAG_SECONDS", 20))
+    # Deletions are kept this long, an older cursor gets a full sync
+    SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", 30))
+    SYNC_PRUNE_INTERVAL = 3600
+
+    # Responses to writes with an Idempotency-Key header are replayed to
+    # retries for this long. A request that never finished (worker killed)
+    # blocks its key for IDEMPOTENCY_PENDING_TIMEOUT, then a retry runs again.
+    IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 86400))
+    IDEMPOTENCY_PENDING_TIMEOUT = int(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", 60))
+    IDEMPOTENCY_PRUNE_INTERVAL = 3600
+
+    # JSON responses with orjson (app/jsonprovider.py) when it is installed
+    JSON_ORJSON = os.getenv("JSON_ORJSON", "true").lower() == "true"
+    # gzip (or br, with Brotli installed) for responses of at least
+    # COMPRESS_MIN_SIZE bytes when the client accepts it
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BR_QUALITY = 5
+
+    # Per-worker cache of (user id, role) for requests with a token.
+    # Account deletion and role changes drop the entry in this worker, the
+    # TTL bounds how long other workers can still see the old one.
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", 60))
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", 10000))
+
+    # /api/classes/stream: classes a slow client may fall behind by before
+    # it is told to resync, and seconds between keepalive comments
+    SEAT_STREAM_BUFFER = 256
+    SEAT_STREAM_HEARTBEAT = 15
+    # Every open stream holds one thread of its worker until the tab is
+    # closed, above this many the stream answers 503. Keep it below the
+    # gunicorn threads per worker (gunicorn.conf.py) so other requests
+    # still find a free thread.
+    SEAT_STREAM_MAX_SUBSCRIBERS = int(os.getenv("SEAT_STREAM_MAX_SUBSCRIBERS", 24))
+
+    # Request metrics in Prometheus format on /api/metrics (opt-in) and a
+    # warning log with the SQL of requests slower than SLOW_REQUEST_MS (0 = off)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 0))
+
+    # werkzeug hash method incl. cost, e.g. "scrypt:32768:8:1" or
+    # "pbkdf2:sha256:1000000". Stored hashes made with other parameters are
+    # upgraded on the user's next successful login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_SALT_LENGTH = 16
+    # Processes hashing passwords per app worker (0 = on the request thread),
+    # hashes that may wait for them, and seconds a request waits for a free
+    # slot before it gets a 503
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 16))
+    PASSWORD_HASH_QUEUE_TIMEOUT = 5
+
+    # Flask-Limiter. memory:// counts per worker process - with several
+    # gunicorn workers point RATELIMIT_STORAGE_URI at a shared store
+    # (e.g. redis://host:6379) or the effective limit is multiplied.
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true"
+    RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+    RATELIMIT_STRATEGY = "fixed-window"
+    RATELIMIT_HEADERS_ENABLED = True
+    # login/register/refresh: per client IP (shared by the three routes), per
+    # email for login/register and per user for refresh
+    AUTH_RATE_LIMIT_PER_IP = os.getenv("AUTH_RATE_LIMIT_PER_IP", "30 per minute;300 per hour")
+    AUTH_RATE_LIMIT_PER_EMAIL = os.getenv("AUTH_RATE_LIMIT_PER_EMAIL", "5 per minute;30 per hour")
+    REFRESH_RATE_LIMIT_PER_USER = os.getenv("REFRESH_RATE_LIMIT_PER_USER", "10 per minute")
+    # join and leave, per user
+    JOIN_RATE_LIMIT_PER_USER = os.getenv("JOIN_RATE_LIMIT_PER_USER", "30 per minute")
+    # Number of proxies in front of the app (Render has one). Without it
+    # every client has the proxy's address and shares one per-IP limit.
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", 0))
+
+    # Each serving process (gunicorn worker, python run.py) opens a DB
+    # connection, builds the catalog cache, loads the revoked tokens and
+    # starts the password hash pool in the background after boot (see
+    # app/health.py and gunicorn.conf.py)
+    WARMUP_ON_START = os.getenv("WARMUP_ON_START", "true").lower() == "true"
@@ -59,13 +59,33 @@ function UserDashboard() {
       .catch((err) => console.error("Fetch classes error:", err));
   };
 
+  // catalog and enrolled classes for the first render in one request
+  const fetchDashboard = () => {
+    const token = localStorage.getItem("token");
+    fetch(`${API_BASE_URL}/dashboard`, {
+      headers: { Authorization: `Bearer ${token}` },
+    })
+      .then((res) => {
+        if (!res.ok) throw new Error("Failed to fetch dashboard");
+        return res.json();
+      })
+      .then((data) => {
+        setCourses(Array.isArray(data.courses) ? data.courses : []);
+        setUserClasses(Array.isArray(data.my_classes) ? data.my_classes : []);
+      })
+      .catch((err) => {
+        console.error("Fetch dashboard error:", err);
+        fetchCourses();
+        fetchUserClasses();
+      });
+  };
+
   useEffect(() => {
     if (!token) {
       navigate("/login");
       return;
     }
-    fetchCourses();
-    fetchUserClasses();
+    fetchDashboard();
   }, [token, navigate]);
 
   const handleViewClasses = (courseId) => {
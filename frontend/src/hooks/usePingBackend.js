@@ -1,12 +1,12 @@
 import { useEffect } from "react";
-import API_BASE_URL from "../api/api";
 
 export function usePingBackend() {
   useEffect(() => {
     const interval = setInterval(() => {
       console.log("Sending ping to backend...");
 
-      fetch(`${API_BASE_URL}/courses/public`)
+      // /healthz needs no database, so the ping stays cheap
+      fetch(`${import.meta.env.VITE_API_URL}/healthz`)
         .then((response) => {
           if (response.ok) {
             console.log("Ping success");
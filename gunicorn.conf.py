@@ -0,0 +1,26 @@
+# gunicorn run:app reads this file from the working directory.
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+
+# /api/classes/stream keeps its thread for as long as the browser tab is
+# open. A sync worker would be busy with one stream and killed after
+# --timeout, so serve with threads; SEAT_STREAM_MAX_SUBSCRIBERS must stay
+# below this.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 32))
+
+
+def on_starting(server):
+    if server.cfg.worker_class_str == "sync" and server.cfg.threads <= 1:
+        raise RuntimeError("Serve with a threaded (gthread) or async (gevent) worker, "
+                           "the seat stream holds a worker for as long as it is open")
+
+
+def post_worker_init(worker):
+    # warm up each worker after the fork, not at import - flask CLI
+    # commands import run.py too, and with --preload the master would
+    # warm up (and open pooled SQLite connections) instead of the workers
+    from app.health import start_warm_up
+    from run import app
+    start_warm_up(app)
@@ -0,0 +1,52 @@
+"""Cascade deletes to classes and enrollments
+
+Revision ID: 243c76c0b50e
+Revises: 862e54b5fc0e
+Create Date: 2026-10-18 14:05:12.518320
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '243c76c0b50e'
+down_revision = '862e54b5fc0e'
+branch_labels = None
+depends_on = None
+
+# The existing foreign keys are unnamed, batch mode needs names to drop them
+naming_convention = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+# table -> [(column, referred table)]
+FOREIGN_KEYS = {
+    'course_class': [('course_id', 'course')],
+    'user_classes': [('user_id', 'user'), ('class_id', 'course_class')],
+    'user_course': [('user_id', 'user'), ('course_id', 'course')],
+}
+
+
+def replace_foreign_keys(ondelete):
+    # SQLite rebuilds each table (copy, drop, rename). Dropping a parent table
+    # with foreign keys enforced would cascade into or block on its children.
+    op.execute('PRAGMA foreign_keys=OFF')
+
+    for table, keys in FOREIGN_KEYS.items():
+        with op.batch_alter_table(table, schema=None, recreate='always',
+                                  naming_convention=naming_convention) as batch_op:
+            for column, referred in keys:
+                name = f'fk_{table}_{column}_{referred}'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+
+    op.execute('PRAGMA foreign_keys=ON')
+
+
+def upgrade():
+    replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    replace_foreign_keys(None)
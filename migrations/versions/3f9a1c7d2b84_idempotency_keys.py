@@ -0,0 +1,35 @@
+"""Store responses to requests with an Idempotency-Key
+
+Revision ID: 3f9a1c7d2b84
+Revises: dc44e35e7561
+Create Date: 2026-10-18 21:02:37.418265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7d2b84'
+down_revision = 'dc44e35e7561'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_key',
+    sa.Column('key', sa.LargeBinary(length=16), nullable=False),
+    sa.Column('request_hash', sa.LargeBinary(length=16), nullable=False),
+    sa.Column('status', sa.SmallInteger(), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('mimetype', sa.String(length=50), nullable=True),
+    sa.Column('expires_at', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    sqlite_with_rowid=False
+    )
+    op.create_index('ix_idempotency_key_expires_at', 'idempotency_key', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_key_expires_at', table_name='idempotency_key')
+    op.drop_table('idempotency_key')
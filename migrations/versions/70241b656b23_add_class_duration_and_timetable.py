@@ -0,0 +1,64 @@
+"""Add class duration and a per-user timetable index
+
+Revision ID: 70241b656b23
+Revises: d16b8fa3047b
+Create Date: 2026-10-18 18:11:37.260144
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '70241b656b23'
+down_revision = 'd16b8fa3047b'
+branch_labels = None
+depends_on = None
+
+# app.models.DEFAULT_CLASS_DURATION as of this revision
+DEFAULT_CLASS_DURATION = 60
+
+
+def upgrade():
+    # plain ADD COLUMNs, neither table is rebuilt and their triggers stay
+    with op.batch_alter_table('course_class', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duration_minutes', sa.SmallInteger(), nullable=True))
+
+    with op.batch_alter_table('user_classes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('weekday', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('start_minute', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('end_minute', sa.SmallInteger(), nullable=True))
+        batch_op.create_index('ix_user_classes_timetable', ['user_id', 'weekday', 'start_minute'], unique=False)
+
+    op.execute(f"""
+        UPDATE user_classes SET (weekday, start_minute, end_minute) = (
+            SELECT weekday, start_minute, start_minute + COALESCE(duration_minutes, {DEFAULT_CLASS_DURATION})
+            FROM course_class WHERE id = user_classes.class_id
+        )
+    """)
+
+    op.execute(f"""CREATE TRIGGER timetable_enroll AFTER INSERT ON user_classes BEGIN
+        UPDATE user_classes SET (weekday, start_minute, end_minute) = (
+            SELECT weekday, start_minute, start_minute + COALESCE(duration_minutes, {DEFAULT_CLASS_DURATION})
+            FROM course_class WHERE id = new.class_id
+        )
+        WHERE user_id = new.user_id AND class_id = new.class_id;
+    END""")
+    op.execute(f"""CREATE TRIGGER timetable_reschedule
+    AFTER UPDATE OF weekday, start_minute, duration_minutes ON course_class BEGIN
+        UPDATE user_classes SET weekday = new.weekday, start_minute = new.start_minute,
+            end_minute = new.start_minute + COALESCE(new.duration_minutes, {DEFAULT_CLASS_DURATION})
+        WHERE class_id = new.id;
+    END""")
+
+
+def downgrade():
+    op.execute('DROP TRIGGER IF EXISTS timetable_enroll')
+    op.execute('DROP TRIGGER IF EXISTS timetable_reschedule')
+
+    # Native DROP COLUMN (SQLite 3.35+) - a batch rebuild of course_class
+    # would trip over the search triggers that refer to it
+    op.drop_index('ix_user_classes_timetable', table_name='user_classes')
+    for column in ('end_minute', 'start_minute', 'weekday'):
+        op.execute(f'ALTER TABLE user_classes DROP COLUMN {column}')
+    op.execute('ALTER TABLE course_class DROP COLUMN duration_minutes')
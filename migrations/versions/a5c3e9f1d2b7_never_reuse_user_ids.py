@@ -0,0 +1,69 @@
+"""Never reuse the id of a deleted user
+
+Revision ID: a5c3e9f1d2b7
+Revises: 3f9a1c7d2b84
+Create Date: 2026-10-19 10:41:08.215530
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c3e9f1d2b7'
+down_revision = '3f9a1c7d2b84'
+branch_labels = None
+depends_on = None
+
+
+@contextmanager
+def foreign_keys_off():
+    # user is rebuilt, dropping it with foreign keys on would cascade into
+    # user_classes and user_course. SQLite ignores PRAGMA foreign_keys inside
+    # a transaction, so the work so far is committed first, and the setting
+    # is read back to be sure.
+    context = op.get_context()
+    enabled = op.get_bind().execute(sa.text('PRAGMA foreign_keys')).scalar()
+    with context.autocommit_block():
+        op.execute('PRAGMA foreign_keys=OFF')
+    if op.get_bind().execute(sa.text('PRAGMA foreign_keys')).scalar():
+        raise RuntimeError('Could not turn off foreign keys, rebuilding user would delete the enrollments')
+
+    yield
+
+    violations = op.get_bind().execute(sa.text('PRAGMA foreign_key_check')).all()
+    if violations:
+        raise RuntimeError(f'Foreign key violations after rebuilding user: {violations}')
+    if enabled:
+        with context.autocommit_block():
+            op.execute('PRAGMA foreign_keys=ON')
+
+
+def upgrade():
+    # Without AUTOINCREMENT SQLite hands the highest id out again once that
+    # user is deleted, and the tokens of the deleted account would work for
+    # the new one
+    with foreign_keys_off(), op.batch_alter_table(
+        'user', recreate='always', table_kwargs={'sqlite_autoincrement': True}
+    ) as batch_op:
+        pass
+
+    # also skip the ids of users deleted before this migration that are
+    # still known (the row is missing while user is empty)
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'user', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'user')"
+    )
+    op.execute(
+        "UPDATE sqlite_sequence SET seq = max(seq, (SELECT coalesce(max(user_id), 0) FROM tombstone)) "
+        "WHERE name = 'user'"
+    )
+
+
+def downgrade():
+    with foreign_keys_off(), op.batch_alter_table(
+        'user', recreate='always', table_kwargs={'sqlite_autoincrement': False}
+    ) as batch_op:
+        pass
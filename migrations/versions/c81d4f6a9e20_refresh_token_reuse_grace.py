@@ -0,0 +1,25 @@
+"""Let a rotated refresh token be reused for a few seconds
+
+Revision ID: c81d4f6a9e20
+Revises: a5c3e9f1d2b7
+Create Date: 2026-10-19 14:22:51.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81d4f6a9e20'
+down_revision = 'a5c3e9f1d2b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # native ADD/DROP COLUMN, no table rebuild needed
+    op.execute('ALTER TABLE revoked_token ADD COLUMN effective_at INTEGER')
+
+
+def downgrade():
+    op.execute('ALTER TABLE revoked_token DROP COLUMN effective_at')
@@ -0,0 +1,173 @@
+"""Store class day and time as integer weekday and start minute
+
+Revision ID: d16b8fa3047b
+Revises: fbbe63e3c01f
+Create Date: 2026-10-18 17:02:13.448301
+
+"""
+from contextlib import contextmanager
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd16b8fa3047b'
+down_revision = 'fbbe63e3c01f'
+branch_labels = None
+depends_on = None
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# SQL turning a weekday number back into its name
+WEEKDAY_NAME = 'CASE {} ' + ' '.join(f"WHEN {i} THEN '{day}'" for i, day in enumerate(WEEKDAYS)) + ' END'
+
+
+TRIGGERS = [
+    'search_course_insert', 'search_course_update', 'search_course_delete',
+    'search_class_insert', 'search_class_update', 'search_class_delete',
+]
+
+
+def drop_search_triggers():
+    # SQLite drops the triggers with their table, and renaming the rebuilt
+    # table fails while another table's trigger refers to the dropped one,
+    # so they go first and are created again after the rebuild
+    for trigger in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+
+def create_search_triggers(day_column, day_of_week):
+    # The search index triggers of fbbe63e3c01f. day_column is the column
+    # the day is stored in, day_of_week the SQL for its name ({} = table).
+    for statement in [
+        """CREATE TRIGGER search_course_insert AFTER INSERT ON course BEGIN
+            INSERT INTO search_index (rowid, kind, ref_id, course_id, name, description)
+            VALUES (new.id * 2, 'course', new.id, new.id, new.name, new.description);
+        END""",
+        """CREATE TRIGGER search_course_update AFTER UPDATE OF name, description ON course BEGIN
+            UPDATE search_index SET name = new.name, description = new.description WHERE rowid = old.id * 2;
+            UPDATE search_index SET name = new.name
+            WHERE rowid IN (SELECT id * 2 + 1 FROM course_class WHERE course_id = new.id);
+        END""",
+        """CREATE TRIGGER search_course_delete AFTER DELETE ON course BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 2;
+        END""",
+        f"""CREATE TRIGGER search_class_insert AFTER INSERT ON course_class BEGIN
+            INSERT INTO search_index (rowid, kind, ref_id, course_id, name, trainer, location, day_of_week)
+            VALUES (new.id * 2 + 1, 'class', new.id, new.course_id,
+                    (SELECT name FROM course WHERE id = new.course_id), new.trainer, new.location,
+                    {day_of_week.format('new')});
+        END""",
+        f"""CREATE TRIGGER search_class_update
+        AFTER UPDATE OF course_id, trainer, location, {day_column} ON course_class BEGIN
+            UPDATE search_index SET course_id = new.course_id, trainer = new.trainer, location = new.location,
+                day_of_week = {day_of_week.format('new')}, name = (SELECT name FROM course WHERE id = new.course_id)
+            WHERE rowid = old.id * 2 + 1;
+        END""",
+        """CREATE TRIGGER search_class_delete AFTER DELETE ON course_class BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+        END""",
+    ]:
+        op.execute(statement)
+
+    # the rebuilt rows carry the day in the new form
+    op.execute("DELETE FROM search_index WHERE kind = 'class'")
+    op.execute(
+        "INSERT INTO search_index (rowid, kind, ref_id, course_id, name, trainer, location, day_of_week) "
+        "SELECT course_class.id * 2 + 1, 'class', course_class.id, course_class.course_id, course.name, "
+        f"course_class.trainer, course_class.location, {day_of_week.format('course_class')} "
+        "FROM course_class JOIN course ON course.id = course_class.course_id"
+    )
+
+
+@contextmanager
+def foreign_keys_off():
+    # course_class is rebuilt, dropping it with foreign keys on would cascade
+    # into user_classes and delete every enrollment. SQLite ignores
+    # PRAGMA foreign_keys inside a transaction, so the work so far is
+    # committed first, and the setting is read back to be sure.
+    context = op.get_context()
+    bind = op.get_bind()
+    enabled = bind.execute(sa.text('PRAGMA foreign_keys')).scalar()
+    with context.autocommit_block():
+        op.execute('PRAGMA foreign_keys=OFF')
+    if op.get_bind().execute(sa.text('PRAGMA foreign_keys')).scalar():
+        raise RuntimeError('Could not turn off foreign keys, rebuilding course_class would delete the enrollments')
+
+    yield
+
+    violations = op.get_bind().execute(sa.text('PRAGMA foreign_key_check')).all()
+    if violations:
+        raise RuntimeError(f'Foreign key violations after rebuilding course_class: {violations}')
+    if enabled:
+        with context.autocommit_block():
+            op.execute('PRAGMA foreign_keys=ON')
+
+
+def parse_weekday(value):
+    name = (value or '').strip().lower()
+    for number, day in enumerate(WEEKDAYS):
+        if len(name) >= 2 and day.lower().startswith(name):
+            return number
+    raise ValueError(value)
+
+
+def parse_time(value):
+    hours, minutes = (int(part) for part in (value or '').strip().split(':')[:2])
+    if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+        raise ValueError(value)
+    return hours * 60 + minutes
+
+
+def upgrade():
+    drop_search_triggers()
+
+    with op.batch_alter_table('course_class', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('weekday', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('start_minute', sa.SmallInteger(), nullable=True))
+
+    bind = op.get_bind()
+    converted, invalid = [], []
+    for class_id, day_of_week, time in bind.execute(sa.text('SELECT id, day_of_week, time FROM course_class')):
+        try:
+            converted.append({'id': class_id, 'weekday': parse_weekday(day_of_week), 'start_minute': parse_time(time)})
+        except ValueError:
+            invalid.append(f'{class_id}: {day_of_week!r} {time!r}')
+    if invalid:
+        # better to stop here than to guess a schedule
+        raise RuntimeError('Cannot convert the schedule of classes ' + ', '.join(invalid))
+    if converted:
+        bind.execute(sa.text('UPDATE course_class SET weekday = :weekday, start_minute = :start_minute WHERE id = :id'),
+                     converted)
+
+    with foreign_keys_off(), op.batch_alter_table('course_class', schema=None) as batch_op:
+        batch_op.alter_column('weekday', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.alter_column('start_minute', existing_type=sa.SmallInteger(), nullable=False)
+        batch_op.drop_column('day_of_week')
+        batch_op.drop_column('time')
+        batch_op.create_index('ix_course_class_schedule', ['weekday', 'start_minute'], unique=False)
+
+    create_search_triggers('weekday', WEEKDAY_NAME.format('{}.weekday'))
+
+
+def downgrade():
+    drop_search_triggers()
+
+    with op.batch_alter_table('course_class', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('day_of_week', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('time', sa.String(length=8), nullable=True))
+
+    op.execute(
+        f"UPDATE course_class SET day_of_week = {WEEKDAY_NAME.format('weekday')}, "
+        "time = printf('%02d:%02d', start_minute / 60, start_minute % 60)"
+    )
+
+    with foreign_keys_off(), op.batch_alter_table('course_class', schema=None) as batch_op:
+        batch_op.drop_index('ix_course_class_schedule')
+        batch_op.alter_column('day_of_week', existing_type=sa.String(length=10), nullable=False)
+        batch_op.alter_column('time', existing_type=sa.String(length=8), nullable=False)
+        batch_op.drop_column('weekday')
+        batch_op.drop_column('start_minute')
+
+    create_search_triggers('day_of_week', '{}.day_of_week')
@@ -0,0 +1,97 @@
+"""Store created_at/updated_at as indexed UTC datetimes, add enrollment times and tombstones
+
+Revision ID: dc44e35e7561
+Revises: 75ab52e25382
+Create Date: 2026-10-18 20:14:51.732904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dc44e35e7561'
+down_revision = '75ab52e25382'
+branch_labels = None
+depends_on = None
+
+TABLES = ('user', 'course', 'course_class')
+
+# How SQLAlchemy stores a DateTime in SQLite
+TIMESTAMP = "strftime('%Y-%m-%d %H:%M:%S', {}) || '.000000'"
+NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+TOMBSTONE_TRIGGERS = [
+    f"""CREATE TRIGGER tombstone_course AFTER DELETE ON course BEGIN
+        INSERT INTO tombstone (kind, ref_id, deleted_at) VALUES ('course', old.id, {NOW});
+    END""",
+    f"""CREATE TRIGGER tombstone_class AFTER DELETE ON course_class BEGIN
+        INSERT INTO tombstone (kind, ref_id, deleted_at) VALUES ('class', old.id, {NOW});
+    END""",
+    f"""CREATE TRIGGER tombstone_enrollment AFTER DELETE ON user_classes BEGIN
+        INSERT INTO tombstone (kind, ref_id, user_id, deleted_at) VALUES ('enrollment', old.class_id, old.user_id, {NOW});
+    END""",
+]
+
+
+def replace_column(table, column, column_type, default, value):
+    # Add, fill, drop the old one, rename: native ALTER TABLEs (SQLite 3.35+).
+    # A batch rebuild would drop the search and timetable triggers on these
+    # tables. NOT NULL needs a DEFAULT in ADD COLUMN, the app always sets
+    # the value itself.
+    op.execute(f'ALTER TABLE "{table}" ADD COLUMN {column}_new {column_type} NOT NULL DEFAULT \'{default}\'')
+    op.execute(f'UPDATE "{table}" SET {column}_new = {value.format(column)}')
+    op.execute(f'ALTER TABLE "{table}" DROP COLUMN {column}')
+    op.execute(f'ALTER TABLE "{table}" RENAME COLUMN {column}_new TO {column}')
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        invalid = bind.execute(sa.text(
+            f'SELECT id, created_at, updated_at FROM "{table}" '
+            'WHERE datetime(created_at) IS NULL OR datetime(updated_at) IS NULL'
+        )).all()
+        if invalid:
+            # better to stop here than to guess a time
+            raise RuntimeError(f'Cannot convert the timestamps of {table} rows {invalid}')
+
+    for table in TABLES:
+        for column in ('created_at', 'updated_at'):
+            # the old values were UTC + 1 hour
+            replace_column(table, column, 'DATETIME', '1970-01-01 00:00:00.000000',
+                           TIMESTAMP.format("{}, '-1 hour'"))
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'], unique=False)
+
+    # when existing enrollments were made is unknown, they count from now
+    op.execute("ALTER TABLE user_classes ADD COLUMN created_at DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00.000000'")
+    op.execute(f'UPDATE user_classes SET created_at = {NOW}')
+    op.create_index('ix_user_classes_created_at', 'user_classes', ['created_at'], unique=False)
+
+    op.create_table('tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('ref_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstone_deleted_at', 'tombstone', ['deleted_at'], unique=False)
+    for statement in TOMBSTONE_TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade():
+    for trigger in ('tombstone_course', 'tombstone_class', 'tombstone_enrollment'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.drop_index('ix_tombstone_deleted_at', table_name='tombstone')
+    op.drop_table('tombstone')
+
+    op.drop_index('ix_user_classes_created_at', table_name='user_classes')
+    op.execute('ALTER TABLE user_classes DROP COLUMN created_at')
+
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        for column in ('created_at', 'updated_at'):
+            replace_column(table, column, 'VARCHAR(19)', '1970-01-01 01:00:00',
+                           "strftime('%Y-%m-%d %H:%M:%S', {}, '+1 hour')")
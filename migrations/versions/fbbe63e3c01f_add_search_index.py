@@ -0,0 +1,82 @@
+"""Add the FTS5 search index over courses and classes
+
+Revision ID: fbbe63e3c01f
+Revises: 243c76c0b50e
+Create Date: 2026-10-18 16:20:41.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fbbe63e3c01f'
+down_revision = '243c76c0b50e'
+branch_labels = None
+depends_on = None
+
+# A copy of app.search.SEARCH_INDEX_DDL as of this revision.
+# SQLite drops the triggers together with their table, so a later batch
+# migration that recreates course or course_class has to create them again.
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED, ref_id UNINDEXED, course_id UNINDEXED,
+        name, description, trainer, location, day_of_week,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS search_course_insert AFTER INSERT ON course BEGIN
+        INSERT INTO search_index (rowid, kind, ref_id, course_id, name, description)
+        VALUES (new.id * 2, 'course', new.id, new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_course_update AFTER UPDATE OF name, description ON course BEGIN
+        UPDATE search_index SET name = new.name, description = new.description WHERE rowid = old.id * 2;
+        UPDATE search_index SET name = new.name
+        WHERE rowid IN (SELECT id * 2 + 1 FROM course_class WHERE course_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_course_delete AFTER DELETE ON course BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_class_insert AFTER INSERT ON course_class BEGIN
+        INSERT INTO search_index (rowid, kind, ref_id, course_id, name, trainer, location, day_of_week)
+        VALUES (new.id * 2 + 1, 'class', new.id, new.course_id,
+                (SELECT name FROM course WHERE id = new.course_id), new.trainer, new.location, new.day_of_week);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_class_update
+    AFTER UPDATE OF course_id, trainer, location, day_of_week ON course_class BEGIN
+        UPDATE search_index SET course_id = new.course_id, trainer = new.trainer, location = new.location,
+            day_of_week = new.day_of_week, name = (SELECT name FROM course WHERE id = new.course_id)
+        WHERE rowid = old.id * 2 + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_class_delete AFTER DELETE ON course_class BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+
+TRIGGERS = [
+    'search_course_insert', 'search_course_update', 'search_course_delete',
+    'search_class_insert', 'search_class_update', 'search_class_delete',
+]
+
+
+def upgrade():
+    for statement in SEARCH_INDEX_DDL:
+        op.execute(statement)
+
+    # index the rows that already exist
+    op.execute("DELETE FROM search_index")
+    op.execute(
+        "INSERT INTO search_index (rowid, kind, ref_id, course_id, name, description) "
+        "SELECT id * 2, 'course', id, id, name, description FROM course"
+    )
+    op.execute(
+        "INSERT INTO search_index (rowid, kind, ref_id, course_id, name, trainer, location, day_of_week) "
+        "SELECT course_class.id * 2 + 1, 'class', course_class.id, course_class.course_id, course.name, "
+        "course_class.trainer, course_class.location, course_class.day_of_week "
+        "FROM course_class JOIN course ON course.id = course_class.course_id"
+    )
+
+
+def downgrade():
+    for trigger in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS search_index')
@@ -1,9 +1,14 @@
 from dotenv import load_dotenv
 from app import create_app
+from app.health import start_warm_up
 
 load_dotenv()
 
 app = create_app()
 
 if __name__ == "__main__":
+    # Only in serving processes: flask CLI commands (db upgrade, import-data)
+    # import this module too. Under gunicorn, post_worker_init in
+    # gunicorn.conf.py starts it in each worker.
+    start_warm_up(app)
     app.run(debug=True)